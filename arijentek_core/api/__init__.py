@@ -1,7 +1,11 @@
+from collections import Counter
+
 import frappe
 from frappe import _
-from frappe.utils import nowdate, now_datetime, getdate, get_first_day, get_last_day, flt
+from frappe.utils import nowdate, now_datetime, getdate, get_first_day, get_last_day, flt, cint, add_days
 from frappe.rate_limiter import rate_limit
+from frappe.utils.caching import site_cache
+from arijentek_core.utils import month_bounds
 from datetime import datetime, timedelta
 
 # ============ DASHBOARD ============
@@ -10,91 +14,67 @@ from datetime import datetime, timedelta
 @frappe.whitelist()
 def get_dashboard_data():
 	"""Get all dashboard data in one call"""
-	employee = get_current_employee()
-	if not employee:
+	today = getdate(nowdate())
+
+	# Employee details and today's last punch in one round trip
+	emp_info = frappe.db.sql(
+		"""
+		SELECT e.name, e.employee_name, e.department, e.designation,
+			c.name as checkin, c.time as checkin_time, c.log_type
+		FROM `tabEmployee` e
+		LEFT JOIN `tabEmployee Checkin` c ON c.name = (
+			SELECT c2.name FROM `tabEmployee Checkin` c2
+			WHERE c2.employee = e.name AND c2.time >= %s AND c2.time < %s
+			ORDER BY c2.time DESC
+			LIMIT 1
+		)
+		WHERE e.user_id = %s
+		LIMIT 1
+		""",
+		(today, add_days(today, 1), frappe.session.user),
+		as_dict=True,
+	)
+	if not emp_info:
 		# Return empty structure for non-employees (e.g. Administrator)
 		return {
 			"employee": "",
 			"employee_name": frappe.session.user,
 			"department": "",
 			"designation": "",
-			"current_month": getdate(nowdate()).strftime("%B"),
-			"year": getdate(nowdate()).year,
+			"current_month": today.strftime("%B"),
+			"year": today.year,
 			"last_punch": None,
 			"attendance_summary": {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0},
 			"leave_type_breakdown": {},
 		}
 
-	today = nowdate()
-	current_month = getdate(today).strftime("%B")
-	year = getdate(today).year
-
-	# Get last checkin
-	last_checkin = frappe.db.sql(
-		"""
-        SELECT name, time, log_type
-        FROM `tabEmployee Checkin`
-        WHERE employee = %s AND DATE(time) = %s
-        ORDER BY time DESC
-        LIMIT 1
-    """,
-		(employee, today),
-		as_dict=True,
-	)
+	emp_info = emp_info[0]
+	employee = emp_info.name
+	current_month = today.strftime("%B")
+	year = today.year
 
 	last_punch = None
-	if last_checkin:
+	if emp_info.checkin:
 		last_punch = {
-			"name": last_checkin[0].name,
-			"time": last_checkin[0].time.isoformat()
-			if hasattr(last_checkin[0].time, "isoformat")
-			else str(last_checkin[0].time),
-			"log_type": last_checkin[0].log_type,
+			"name": emp_info.checkin,
+			"time": emp_info.checkin_time.isoformat(),
+			"log_type": emp_info.log_type,
 		}
 
 	# Get attendance summary
 	first_day = get_first_day(today)
 	last_day = get_last_day(today)
 
-	summary = frappe.db.sql(
-		"""
-        SELECT status, COUNT(*) as count
-        FROM `tabAttendance`
-        WHERE employee = %s
-        AND attendance_date BETWEEN %s AND %s
-        AND docstatus = 1
-        GROUP BY status
-    """,
-		(employee, first_day, last_day),
-		as_dict=True,
-	)
+	# Status counts and the "On Leave" leave-type breakdown from one (cached) scan
+	summary = _get_monthly_attendance_counts(employee, first_day, last_day)
 
 	attendance_summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
+	leave_type_breakdown = {}
 	for row in summary:
 		if row.status in attendance_summary:
-			attendance_summary[row.status] = row.count
-
-	# Get leave-type breakdown for "On Leave" days
-	on_leave_types = frappe.db.sql(
-		"""
-		SELECT leave_type, COUNT(*) as count
-		FROM `tabAttendance`
-		WHERE employee = %s
-		AND attendance_date BETWEEN %s AND %s
-		AND docstatus = 1
-		AND status = 'On Leave'
-		GROUP BY leave_type
-		""",
-		(employee, first_day, last_day),
-		as_dict=True,
-	)
-	leave_type_breakdown = {r.leave_type: r.count for r in on_leave_types}
-
-	emp_info = frappe.db.get_value(
-		"Employee", employee,
-		["employee_name", "department", "designation"],
-		as_dict=True
-	) or {}
+			attendance_summary[row.status] += row.count
+		if row.status == "On Leave":
+			leave_type_breakdown[row.leave_type] = row.count
 
 	return {
 		"employee": employee,
@@ -115,13 +95,21 @@ def get_dashboard_data():
 @frappe.whitelist()
 def get_employee_info():
 	"""Get current employee details"""
-	user = frappe.session.user
+	employee = get_current_employee()
+	info = _get_employee_info(employee) if employee else None
+	if not info:
+		return {"error": "No employee record found for this user"}
+
+	return info
+
+
+def _get_employee_info(employee):
+	"""Return basic details for an employee, or None if it does not exist."""
 	employee = frappe.db.get_value(
-		"Employee", {"user_id": user}, ["name", "employee_name", "department", "designation"], as_dict=True
+		"Employee", employee, ["name", "employee_name", "department", "designation"], as_dict=True
 	)
-
 	if not employee:
-		return {"error": "No employee record found for this user"}
+		return None
 
 	return {
 		"employee_id": employee.name,
@@ -136,6 +124,9 @@ def get_employee_info():
 # Maximum shift duration in hours — auto clock-out after this
 MAX_SHIFT_HOURS = 12
 
+# Punches closer together than this are treated as a double tap / client retry
+PUNCH_DEBOUNCE_SECONDS = 60
+
 
 @frappe.whitelist()
 def get_today_checkin():
@@ -150,40 +141,34 @@ def get_today_checkin():
 	if not employee:
 		return {"clock_in": None, "clock_out": None, "completed": False}
 
-	today = nowdate()
+	return _get_today_checkin(employee)
 
-	checkins = frappe.db.sql(
+
+def _get_today_checkin(employee):
+	"""Today's first IN / OUT for an employee (see ``get_today_checkin``)."""
+	today = getdate(nowdate())
+
+	# Range predicate (not DATE(time)) so the (employee, time) index is usable
+	row = frappe.db.sql(
 		"""
-		SELECT time, log_type
+		SELECT
+			MIN(CASE WHEN log_type = 'IN' THEN time END) as clock_in,
+			MIN(CASE WHEN log_type = 'OUT' THEN time END) as clock_out
 		FROM `tabEmployee Checkin`
-		WHERE employee = %s AND DATE(time) = %s
-		ORDER BY time ASC
+		WHERE employee = %s AND time >= %s AND time < %s
 		""",
-		(employee, today),
+		(employee, today, add_days(today, 1)),
 		as_dict=True,
-	)
-
-	if not checkins:
-		return {"clock_in": None, "clock_out": None, "completed": False}
-
-	in_log = None
-	out_log = None
-	for c in checkins:
-		if c.log_type == "IN" and not in_log:
-			in_log = c
-		elif c.log_type == "OUT" and not out_log:
-			out_log = c
-
-	completed = bool(in_log and out_log)
+	)[0]
 
 	return {
-		"clock_in": in_log.time.isoformat() if in_log and hasattr(in_log.time, "isoformat") else (str(in_log.time) if in_log else None),
-		"clock_out": out_log.time.isoformat() if out_log and hasattr(out_log.time, "isoformat") else (str(out_log.time) if out_log else None),
-		"completed": completed,
+		"clock_in": row.clock_in.isoformat() if row.clock_in else None,
+		"clock_out": row.clock_out.isoformat() if row.clock_out else None,
+		"completed": bool(row.clock_in and row.clock_out),
 	}
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 @rate_limit(limit=10, seconds=60)
 def clock_in():
 	"""Record clock in (once per day only) and auto-mark attendance"""
@@ -191,33 +176,25 @@ def clock_in():
 	if not employee:
 		return {"success": False, "error": "Employee not found"}
 
-	today = nowdate()
+	checkin_time = now_datetime()
 
-	# Check if already clocked in today
-	existing_in = frappe.db.exists(
-		"Employee Checkin",
-		{"employee": employee, "log_type": "IN", "time": ["between", [today, f"{today} 23:59:59"]]},
-	)
-	if existing_in:
+	# Check if already clocked in today (locked, so a double tap cannot insert two INs)
+	checkins = _get_checkins_for_update(employee, checkin_time.date())
+	in_log = next((c for c in checkins if c.log_type == "IN"), None)
+	if in_log:
+		if _is_duplicate_punch(in_log, checkin_time):
+			return {"success": True, "time": in_log.time.isoformat()}
 		return {"success": False, "error": "You have already clocked in today"}
 
 	try:
-		checkin = frappe.get_doc(
-			{"doctype": "Employee Checkin", "employee": employee, "time": now_datetime(), "log_type": "IN"}
-		)
-		checkin.insert(ignore_permissions=True)
-		frappe.db.commit()
+		_insert_checkin(employee, checkin_time, "IN")
 
-		# Auto-sync attendance after clock in
-		from arijentek_core.attendance.auto_attendance import sync_attendance_after_clock
-		sync_attendance_after_clock(employee, checkin.time)
-
-		return {"success": True, "time": checkin.time.isoformat()}
+		return {"success": True, "time": checkin_time.isoformat()}
 	except Exception as e:
 		return {"success": False, "error": str(e)}
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 @rate_limit(limit=10, seconds=60)
 def clock_out():
 	"""Record clock out (must have clocked in first, once per day) and auto-mark attendance"""
@@ -225,53 +202,36 @@ def clock_out():
 	if not employee:
 		return {"success": False, "error": "Employee not found"}
 
-	today = nowdate()
+	now = now_datetime()
+	checkins = _get_checkins_for_update(employee, now.date())
 
 	# Must have clocked in today
-	in_checkin = frappe.db.sql(
-		"""
-		SELECT time FROM `tabEmployee Checkin`
-		WHERE employee = %s AND DATE(time) = %s AND log_type = 'IN'
-		ORDER BY time ASC LIMIT 1
-		""",
-		(employee, today),
-		as_dict=True,
-	)
-	if not in_checkin:
+	in_log = next((c for c in checkins if c.log_type == "IN"), None)
+	if not in_log:
 		return {"success": False, "error": "You must clock in before clocking out"}
 
 	# Check if already clocked out today
-	existing_out = frappe.db.exists(
-		"Employee Checkin",
-		{"employee": employee, "log_type": "OUT", "time": ["between", [today, f"{today} 23:59:59"]]},
-	)
-	if existing_out:
+	out_log = next((c for c in checkins if c.log_type == "OUT"), None)
+	if out_log:
+		if _is_duplicate_punch(out_log, now):
+			return {"success": True, "time": out_log.time.isoformat()}
 		return {"success": False, "error": "You have already clocked out today"}
 
 	# Enforce max shift duration
-	clock_in_time = in_checkin[0].time
-	now = now_datetime()
+	clock_in_time = in_log.time
 	hours_worked = (now - clock_in_time).total_seconds() / 3600
 	if hours_worked > MAX_SHIFT_HOURS:
 		return {"success": False, "error": f"Shift exceeded {MAX_SHIFT_HOURS} hours. Please contact HR."}
 
 	try:
-		checkin = frappe.get_doc(
-			{"doctype": "Employee Checkin", "employee": employee, "time": now, "log_type": "OUT"}
-		)
-		checkin.insert(ignore_permissions=True)
-		frappe.db.commit()
-
-		# Auto-sync attendance after clock out
-		from arijentek_core.attendance.auto_attendance import sync_attendance_after_clock
-		sync_attendance_after_clock(employee, checkin.time)
+		_insert_checkin(employee, now, "OUT")
 
-		return {"success": True, "time": checkin.time.isoformat()}
+		return {"success": True, "time": now.isoformat()}
 	except Exception as e:
 		return {"success": False, "error": str(e)}
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 @rate_limit(limit=10, seconds=60)
 def punch(timestamp=None):
 	"""Unified punch endpoint — one clock-in and one clock-out per day.
@@ -303,19 +263,20 @@ def punch(timestamp=None):
 
 	punch_date = punch_time.date()
 
-	# Get checkins for the PUNCH DATE (not necessarily today)
-	today_checkins = frappe.db.sql(
-		"""
-		SELECT time, log_type FROM `tabEmployee Checkin`
-		WHERE employee = %s AND DATE(time) = %s
-		ORDER BY time ASC
-		""",
-		(employee, punch_date),
-		as_dict=True,
-	)
+	# Get checkins for the PUNCH DATE (not necessarily today), locked against concurrent punches
+	today_checkins = _get_checkins_for_update(employee, punch_date)
+
+	# A double tap / retried request returns the punch it already recorded
+	if today_checkins and _is_duplicate_punch(today_checkins[-1], punch_time):
+		last = today_checkins[-1]
+		return {"status": "success", "log_type": last.log_type, "time": last.time.isoformat()}
 
-	has_in = any(c.log_type == "IN" for c in today_checkins)
-	has_out = any(c.log_type == "OUT" for c in today_checkins)
+	# First log of each type, from the one locked read
+	first_log = {}
+	for c in today_checkins:
+		first_log.setdefault(c.log_type, c)
+	has_in = "IN" in first_log
+	has_out = "OUT" in first_log
 
 	# Already completed for the day
 	if has_in and has_out:
@@ -326,52 +287,328 @@ def punch(timestamp=None):
 		log_type = "IN"
 	elif has_in and not has_out:
 		log_type = "OUT"
-		# Enforce max shift duration
-		in_time = next(c.time for c in today_checkins if c.log_type == "IN")
-		
-		# Calculate hours worked based on PUNCH TIME
-		if isinstance(in_time, str):
-			in_time = get_datetime(in_time)
-			
-		hours_worked = (punch_time - in_time).total_seconds() / 3600
+		# Enforce max shift duration, based on PUNCH TIME
+		hours_worked = (punch_time - first_log["IN"].time).total_seconds() / 3600
 		if hours_worked > MAX_SHIFT_HOURS:
 			return {"status": "error", "error": f"Shift exceeded {MAX_SHIFT_HOURS} hours. Please contact HR."}
 	else:
 		return {"status": "error", "error": "Invalid state"}
 
 	try:
-		checkin = frappe.get_doc(
-			{
-				"doctype": "Employee Checkin",
-				"employee": employee,
-				"time": punch_time,
-				"log_type": log_type,
-			}
-		)
-		checkin.insert(ignore_permissions=True)
-		frappe.db.commit()
-
-		# Auto-sync attendance after punch
-		from arijentek_core.attendance.auto_attendance import sync_attendance_after_clock
-		sync_attendance_after_clock(employee, checkin.time)
+		_insert_checkin(employee, punch_time, log_type)
 
 		return {
 			"status": "success",
-
 			"log_type": log_type,
-			"time": checkin.time.isoformat() if hasattr(checkin.time, "isoformat") else str(checkin.time),
+			"time": punch_time.isoformat(),
 		}
 	except Exception as e:
 		return {"status": "error", "error": str(e)}
 
 
+def _insert_checkin(employee, time, log_type):
+	"""Write an Employee Checkin row and return its name.
+
+	Punches are an append-only log, so by default the row is written with a
+	single INSERT instead of running the full document controller. The
+	shift fields the controller would fetch are filled from HRMS, so Shift
+	Type auto-attendance still picks the punch up. Sites that rely on other
+	Employee Checkin controller hooks can set
+	``arijentek_checkin_use_controller`` in site config to use the ORM path.
+
+	Attendance is synced exactly once per punch: by the Employee Checkin
+	after_insert hook on the ORM path, or enqueued here on the raw path,
+	which bypasses hooks. Endpoints must not sync again themselves.
+	"""
+	if frappe.conf.get("arijentek_checkin_use_controller"):
+		checkin = frappe.get_doc(
+			{"doctype": "Employee Checkin", "employee": employee, "time": time, "log_type": log_type}
+		)
+		checkin.insert(ignore_permissions=True)
+		return checkin.name
+
+	# The punch endpoints hold the Employee row lock (_lock_employee), so the
+	# row can't go away between this read and the insert
+	employee_row = frappe.db.sql("SELECT employee_name FROM `tabEmployee` WHERE name = %s", employee)
+	if not employee_row:
+		frappe.throw(_("Employee {0} not found").format(employee), frappe.DoesNotExistError)
+
+	name = frappe.generate_hash(length=10)
+	timestamp = now_datetime()
+	user = frappe.session.user
+	shift = _get_shift_fields(employee, time)
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabEmployee Checkin`
+			(name, owner, creation, modified, modified_by, docstatus,
+			employee, employee_name, time, log_type,
+			shift, shift_start, shift_end, shift_actual_start, shift_actual_end)
+		VALUES (%s, %s, %s, %s, %s, 0, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+		""",
+		(
+			name, user, timestamp, timestamp, user,
+			employee, employee_row[0][0], time, log_type,
+			*(shift[field] for field in CHECKIN_SHIFT_FIELDS),
+		),
+	)
+
+	from arijentek_core.attendance.auto_attendance import enqueue_attendance_sync
+
+	clear_last_checkin_cache(frappe._dict(employee=employee))
+	enqueue_attendance_sync(employee, time)
+	return name
+
+
+CHECKIN_SHIFT_FIELDS = ("shift", "shift_start", "shift_end", "shift_actual_start", "shift_actual_end")
+
+
+def _get_shift_fields(employee, time):
+	"""Shift fields the Employee Checkin controller's fetch_shift would set.
+
+	The raw insert paths skip the controller, so they fill these here. Empty
+	when HRMS is not installed or the employee has no shift at ``time``.
+	"""
+	try:
+		from hrms.hr.doctype.shift_assignment.shift_assignment import (
+			get_actual_start_end_datetime_of_shift,
+		)
+	except ImportError:
+		return dict.fromkeys(CHECKIN_SHIFT_FIELDS)
+
+	from frappe.utils import get_datetime
+
+	timings = get_actual_start_end_datetime_of_shift(employee, get_datetime(time), True)
+	if not timings:
+		return dict.fromkeys(CHECKIN_SHIFT_FIELDS)
+
+	return {
+		"shift": timings.shift_type.name,
+		"shift_start": timings.start_datetime,
+		"shift_end": timings.end_datetime,
+		"shift_actual_start": timings.actual_start,
+		"shift_actual_end": timings.actual_end,
+	}
+
+
+@frappe.whitelist(methods=["POST"])
+def bulk_clock_events(events):
+	"""Import a burst of punches (e.g. a biometric device sync) in bulk.
+
+	Args:
+		events: JSON list of {"employee" or "user_id", "time", "log_type", "device_id"}
+
+	Rows are written with multi-row INSERTs; punches that already exist for
+	the same employee and time are skipped, and unknown employees are
+	reported in ``errors``. Attendance for the affected
+	(employee, date) pairs is synced in one background job. Requires
+	Employee Checkin create permission.
+	"""
+	from frappe.utils import get_datetime
+
+	if not frappe.has_permission("Employee Checkin", "create"):
+		frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	events = frappe.parse_json(events) or []
+
+	# Resolve user_id → employee, and check employee IDs exist, once per unique value
+	employee_ids = {e.get("employee") for e in events if e.get("employee")}
+	user_ids = {e.get("user_id") for e in events if not e.get("employee") and e.get("user_id")}
+	employee_by_user = {}
+	employee_names = {}
+	if user_ids:
+		for name, user_id, employee_name in frappe.get_all(
+			"Employee",
+			filters={"user_id": ["in", list(user_ids)]},
+			fields=["name", "user_id", "employee_name"],
+			as_list=True,
+		):
+			employee_by_user[user_id] = name
+			employee_names[name] = employee_name
+	if employee_ids:
+		employee_names.update(
+			frappe.get_all(
+				"Employee",
+				filters={"name": ["in", list(employee_ids)]},
+				fields=["name", "employee_name"],
+				as_list=True,
+			)
+		)
+
+	rows = []
+	errors = []
+	employees = set()
+	first_time = last_time = None
+	for idx, event in enumerate(events):
+		employee = event.get("employee") or employee_by_user.get(event.get("user_id"))
+		log_type = event.get("log_type")
+		try:
+			time = get_datetime(event.get("time"))
+		except Exception:
+			time = None
+
+		if not employee or not time or log_type not in ("IN", "OUT"):
+			errors.append({"index": idx, "error": "Invalid event"})
+			continue
+		if employee not in employee_names:
+			errors.append({"index": idx, "error": f"Unknown employee {employee}"})
+			continue
+		rows.append((employee, time, log_type, event.get("device_id")))
+		# Employees and time bounds for the duplicate check, gathered in the same pass
+		employees.add(employee)
+		if first_time is None or time < first_time:
+			first_time = time
+		if last_time is None or time > last_time:
+			last_time = time
+
+	if not rows:
+		return {"success": not errors, "inserted": 0, "skipped": 0, "errors": errors}
+
+	# Skip punches that are already recorded (device re-syncs resend history)
+	existing = set(
+		frappe.db.sql(
+			"""
+			SELECT employee, time FROM `tabEmployee Checkin`
+			WHERE employee IN %s AND time BETWEEN %s AND %s
+			""",
+			(list(employees), first_time, last_time),
+		)
+	)
+
+	now = now_datetime()
+	user = frappe.session.user
+	values = []
+	seen = set()
+	for employee, time, log_type, device_id in rows:
+		if (employee, time) in existing or (employee, time) in seen:
+			continue
+		seen.add((employee, time))
+		shift = _get_shift_fields(employee, time)
+		values.append(
+			(
+				frappe.generate_hash(length=10), user, now, now, user, 0,
+				employee, employee_names[employee], time, log_type, device_id,
+				*(shift[field] for field in CHECKIN_SHIFT_FIELDS),
+			)
+		)
+
+	frappe.db.bulk_insert(
+		"Employee Checkin",
+		fields=[
+			"name", "owner", "creation", "modified", "modified_by", "docstatus",
+			"employee", "employee_name", "time", "log_type", "device_id",
+			*CHECKIN_SHIFT_FIELDS,
+		],
+		values=values,
+		chunk_size=1000,
+	)
+
+	if values:
+		# bulk_insert skips doc_events
+		for employee in {v[6] for v in values}:
+			clear_last_checkin_cache(frappe._dict(employee=employee))
+
+		pairs = sorted({(v[6], str(getdate(v[8]))) for v in values})
+		frappe.enqueue(
+			"arijentek_core.attendance.auto_attendance.sync_attendance_for_pairs",
+			queue="long",
+			pairs=pairs,
+			enqueue_after_commit=True,
+		)
+
+	return {
+		"success": not errors,
+		"inserted": len(values),
+		"skipped": len(rows) - len(values),
+		"errors": errors,
+	}
+
+
+def _get_checkins_for_update(employee, date):
+	"""Lock an employee's punches and return their checkins for ``date`` (oldest first).
+
+	Locking the Employee row serialises concurrent punches for the same
+	employee; the checkins are read with a locking read so a waiting request
+	sees rows committed by the one ahead of it. The lock is released when
+	the request's transaction commits.
+	"""
+	_lock_employee(employee)
+	return frappe.db.sql(
+		"""
+		SELECT time, log_type FROM `tabEmployee Checkin`
+		WHERE employee = %s AND time >= %s AND time < %s
+		ORDER BY time ASC
+		FOR UPDATE
+		""",
+		(employee, date, add_days(date, 1)),
+		as_dict=True,
+	)
+
+
+def _is_duplicate_punch(checkin, time):
+	"""True if ``time`` is within PUNCH_DEBOUNCE_SECONDS of an existing checkin."""
+	return abs((time - checkin.time).total_seconds()) < PUNCH_DEBOUNCE_SECONDS
+
+
+LAST_CHECKIN_CACHE_KEY = "arijentek_last_checkin"
+LAST_CHECKIN_CACHE_TTL = 60
+
+
+def get_last_checkin(employee):
+	"""The employee's latest checkin as ``{"log_type", "time"}``, or None.
+
+	Read on every status poll and dashboard refresh, so it is cached in
+	Redis briefly; dropped by the Employee Checkin hooks and by the raw
+	insert paths, which bypass them.
+	"""
+	key = f"{LAST_CHECKIN_CACHE_KEY}:{employee}"
+	last = frappe.cache.get_value(key)
+	if last is None:
+		rows = frappe.get_all(
+			"Employee Checkin",
+			filters={"employee": employee},
+			fields=["log_type", "time"],
+			order_by="time desc",
+			limit=1,
+		)
+		# Cached as {} when there is none, so misses are cached too
+		last = {"log_type": rows[0].log_type, "time": rows[0].time} if rows else {}
+		frappe.cache.set_value(key, last, expires_in_sec=LAST_CHECKIN_CACHE_TTL)
+
+	return last or None
+
+
+def clear_last_checkin_cache(doc, method=None):
+	"""Hook: drop an employee's cached last checkin when one of their checkins changes."""
+	frappe.cache.delete_value(f"{LAST_CHECKIN_CACHE_KEY}:{doc.employee}")
+
+
 # ============ LEAVE MANAGEMENT ============
 
 
+LEAVE_TYPES_CACHE_KEY = "arijentek_leave_types_active"
+
+
 @frappe.whitelist()
 def get_leave_types():
-	"""Get available leave types from ERPNext (non-LWP leave types)"""
-	return frappe.get_all("Leave Type", filters={"is_lwp": 0}, pluck="name")
+	"""Get available leave types from ERPNext (non-LWP leave types, cached until a Leave Type changes)"""
+	return frappe.cache.get_value(
+		LEAVE_TYPES_CACHE_KEY,
+		generator=lambda: frappe.get_all("Leave Type", filters={"is_lwp": 0}, pluck="name"),
+	)
+
+
+def clear_leave_types_cache(doc=None, method=None):
+	"""Hook: drop the cached leave type list when a Leave Type is saved or deleted."""
+	frappe.cache.delete_value(LEAVE_TYPES_CACHE_KEY)
+
+
+HOLIDAYS_CACHE_KEY = "arijentek_holidays"
+HOLIDAYS_CACHE_TTL = 24 * 60 * 60
+
+
+def clear_holidays_cache(doc, method=None):
+	"""Hook: drop cached holiday ranges of a Holiday List when it is saved or deleted."""
+	frappe.cache.delete_keys(f"{HOLIDAYS_CACHE_KEY}:{doc.name}:")
 
 
 @frappe.whitelist()
@@ -390,43 +627,80 @@ def get_holidays(from_date=None, to_date=None, exclude_weekly_off=None):
 	if not employee:
 		return []
 
-	try:
-		from erpnext.setup.doctype.employee.employee import get_holiday_list_for_employee
-	except ImportError:
-		return []
-
-	holiday_list = get_holiday_list_for_employee(employee, raise_exception=False)
+	holiday_list = _get_employee_holiday_list(employee)
 	if not holiday_list:
 		return []
 
 	today = nowdate()
-	from_date = from_date or get_first_day(today)
-	to_date = to_date or get_last_day(today)
+	from_date = getdate(from_date or get_first_day(today))
+	to_date = getdate(to_date or get_last_day(today))
+	exclude_weekly_off = exclude_weekly_off in (1, "1", True, "true", "True")
+
+	cache_key = f"{HOLIDAYS_CACHE_KEY}:{holiday_list}:{from_date}:{to_date}:{int(exclude_weekly_off)}"
+	holidays = frappe.cache.get_value(cache_key)
+	if holidays is None:
+		holidays = _get_holidays(holiday_list, from_date, to_date, exclude_weekly_off)
+		frappe.cache.set_value(cache_key, holidays, expires_in_sec=HOLIDAYS_CACHE_TTL)
+
+	return holidays
 
-	filters = {
-		"parent": holiday_list,
-		"holiday_date": ["between", [from_date, to_date]],
-	}
 
+EMPLOYEE_HOLIDAY_LIST_CACHE_KEY = "arijentek_employee_holiday_list"
+EMPLOYEE_HOLIDAY_LIST_CACHE_TTL = 60 * 60
+
+
+def _get_employee_holiday_list(employee):
+	"""The employee's Holiday List (own, else the company's), or None.
+
+	Memoised for the request and cached in Redis for an hour; the Employee
+	hooks drop it, company default changes are picked up by the TTL.
+	"""
+	memo = getattr(frappe.local, "arijentek_employee_holiday_list", None)
+	if memo is None:
+		memo = frappe.local.arijentek_employee_holiday_list = {}
+	if employee in memo:
+		return memo[employee]
+
+	key = f"{EMPLOYEE_HOLIDAY_LIST_CACHE_KEY}:{employee}"
+	holiday_list = frappe.cache.get_value(key)
+	if holiday_list is None:
+		try:
+			from erpnext.setup.doctype.employee.employee import get_holiday_list_for_employee
+		except ImportError:
+			return None
+
+		# Cached as "" when there is none, so misses are cached too
+		holiday_list = get_holiday_list_for_employee(employee, raise_exception=False) or ""
+		frappe.cache.set_value(key, holiday_list, expires_in_sec=EMPLOYEE_HOLIDAY_LIST_CACHE_TTL)
+
+	memo[employee] = holiday_list or None
+	return memo[employee]
+
+
+def _get_holidays(holiday_list, from_date, to_date, exclude_weekly_off):
+	"""Holidays of ``holiday_list`` in the range, with dates and descriptions ready for display."""
 	# Exclude weekly off (Sat/Sun) if requested — show only gazetted holidays
-	if exclude_weekly_off in (1, "1", True, "true", "True"):
-		filters["weekly_off"] = 0
-
-	holidays = frappe.get_all(
-		"Holiday",
-		filters=filters,
-		fields=["holiday_date", "description", "weekly_off"],
-		order_by="holiday_date",
+	weekly_off_condition = "AND weekly_off = 0" if exclude_weekly_off else ""
+
+	holidays = frappe.db.sql(
+		f"""
+		SELECT DATE_FORMAT(holiday_date, '%%Y-%%m-%%d') as holiday_date, description, weekly_off
+		FROM `tabHoliday`
+		WHERE parenttype = 'Holiday List' AND parent = %s
+		AND holiday_date BETWEEN %s AND %s
+		{weekly_off_condition}
+		ORDER BY holiday_date
+		""",
+		(holiday_list, from_date, to_date),
+		as_dict=True,
 	)
 
 	from frappe.utils import strip_html
 
 	for h in holidays:
-		dt = h.get("holiday_date")
-		if hasattr(dt, "strftime"):
-			h["holiday_date"] = dt.strftime("%Y-%m-%d")
-		desc = h.get("description") or ""
-		h["description"] = strip_html(desc).strip()
+		desc = (h.description or "").strip()
+		# Descriptions are usually plain text; only parse the ones with markup
+		h.description = strip_html(desc).strip() if "<" in desc else desc
 
 	return holidays
 
@@ -441,51 +715,102 @@ LEAVE_BALANCE_CATEGORIES = [
 
 
 def _get_earned_leave_balance(employee, today):
-	"""Calculate earned leave: 1 day per 20 working days since date of joining, minus used."""
-	date_of_joining = frappe.db.get_value("Employee", employee, "date_of_joining")
-	if not date_of_joining:
-		return 0
-
-	date_of_joining = getdate(date_of_joining)
-	today_d = getdate(today)
-	if date_of_joining > today_d:
-		return 0
+	"""Calculate earned leave: 1 day per 20 working days since date of joining, minus used.
 
-	# Count working days (Present + Half Day) from Attendance
-	working_days_result = frappe.db.sql(
+	Joining date, working days and used days come from one query.
+	"""
+	row = frappe.db.sql(
 		"""
-		SELECT COUNT(DISTINCT attendance_date) as days
-		FROM `tabAttendance`
-		WHERE employee = %s
-		AND docstatus = 1
-		AND attendance_date BETWEEN %s AND %s
-		AND status IN ('Present', 'Half Day')
+		SELECT
+			e.date_of_joining,
+			(
+				SELECT COUNT(DISTINCT a.attendance_date)
+				FROM `tabAttendance` a
+				WHERE a.employee = e.name
+				AND a.docstatus = 1
+				AND a.attendance_date BETWEEN e.date_of_joining AND %(today)s
+				AND a.status IN ('Present', 'Half Day')
+			) as working_days,
+			(
+				SELECT COALESCE(SUM(la.total_leave_days), 0)
+				FROM `tabLeave Application` la
+				WHERE la.employee = e.name
+				AND la.leave_type = 'Earned Leave'
+				AND la.status = 'Approved'
+				AND la.docstatus = 1
+			) as used
+		FROM `tabEmployee` e
+		WHERE e.name = %(employee)s
 		""",
-		(employee, date_of_joining, today_d),
+		{"employee": employee, "today": getdate(today)},
 		as_dict=True,
 	)
-	working_days = flt(working_days_result[0].days) if working_days_result else 0
+	if not row or not row[0].date_of_joining or getdate(row[0].date_of_joining) > getdate(today):
+		return 0
 
 	# Earned = floor(working_days / 20)
-	earned = int(working_days // 20)
+	earned = int(flt(row[0].working_days) // 20)
+
+	balance = earned - flt(row[0].used)
+	return max(0, balance)
+
 
-	# Minus earned leave already taken (Approved Leave Applications)
-	used_result = frappe.db.sql(
+def _get_allocated_leave_balances(employee, leave_types, date):
+	"""Return {leave_type: balance} for allocation-based leave types in one query.
+
+	Sums the Leave Ledger Entries that fall inside each allocation active on
+	``date`` (the same window ``get_leave_balance_on`` uses), instead of
+	calling it once per leave type.
+	"""
+	if not leave_types:
+		return {}
+
+	rows = frappe.db.sql(
 		"""
-		SELECT COALESCE(SUM(total_leave_days), 0) as used
-		FROM `tabLeave Application`
-		WHERE employee = %s
-		AND leave_type = 'Earned Leave'
-		AND status = 'Approved'
-		AND docstatus = 1
+		SELECT la.leave_type, COALESCE(SUM(lle.leaves), 0) as balance
+		FROM `tabLeave Allocation` la
+		INNER JOIN `tabLeave Type` lt
+			ON lt.name = la.leave_type AND lt.is_lwp = 0
+		INNER JOIN `tabLeave Ledger Entry` lle
+			ON lle.employee = la.employee
+			AND lle.leave_type = la.leave_type
+			AND lle.docstatus = 1
+			AND lle.from_date >= la.from_date
+			AND lle.to_date <= la.to_date
+		WHERE la.employee = %(employee)s
+			AND la.leave_type IN %(leave_types)s
+			AND la.docstatus = 1
+			AND la.from_date <= %(date)s
+			AND la.to_date >= %(date)s
+		GROUP BY la.leave_type
 		""",
-		(employee,),
+		{"employee": employee, "leave_types": tuple(leave_types), "date": date},
 		as_dict=True,
 	)
-	used = flt(used_result[0].used) if used_result else 0
+	return {r.leave_type: flt(r.balance) for r in rows}
 
-	balance = earned - used
-	return max(0, balance)
+
+def _get_hrms_leave_balances(employee, leave_types, date):
+	"""Per-type balances from HRMS's ``get_leave_balance_on``.
+
+	Opt-in via ``arijentek_use_hrms_leave_balance`` in site config for sites
+	that need its carry-forward / encashment handling. Leave Type existence
+	is checked for all types in one query instead of once per type.
+	"""
+	from hrms.hr.doctype.leave_application.leave_application import get_leave_balance_on
+
+	existing = frappe.get_all("Leave Type", filters={"name": ["in", leave_types]}, pluck="name")
+
+	balances = {}
+	for leave_type in existing:
+		try:
+			balances[leave_type] = get_leave_balance_on(employee, leave_type, date)
+		except frappe.ValidationError:
+			# Expected for types the employee can't use (no allocation, blocked days); shown as 0.
+			# Anything else, e.g. permission errors, propagates.
+			continue
+
+	return balances
 
 
 @frappe.whitelist()
@@ -495,29 +820,33 @@ def get_leave_balance():
 	if not employee:
 		return []
 
-	from hrms.hr.doctype.leave_application.leave_application import get_leave_balance_on
+	return _get_leave_balance(employee)
+
 
+def _get_leave_balance(employee):
+	"""Leave balance rows for an employee (see ``get_leave_balance``)."""
 	today = nowdate()
-	balance_map = {}
 
-	# Get balances from ERPNext for leave types that exist
+	# Allocation-based types come from a single grouped ledger query;
+	# Earned Leave is accrued from attendance instead.
+	allocation_types = [lt for lt in LEAVE_BALANCE_CATEGORIES if lt != "Earned Leave"]
+	if frappe.conf.get("arijentek_use_hrms_leave_balance"):
+		allocated = _get_hrms_leave_balances(employee, allocation_types, today)
+	else:
+		allocated = _get_allocated_leave_balances(employee, allocation_types, today)
+
+	balance_map = {}
 	for leave_type in LEAVE_BALANCE_CATEGORIES:
 		if leave_type == "Earned Leave":
 			balance_map[leave_type] = _get_earned_leave_balance(employee, today)
 		else:
-			if not frappe.db.exists("Leave Type", leave_type):
-				balance_map[leave_type] = 0
-			else:
-				try:
-					balance_map[leave_type] = get_leave_balance_on(employee, leave_type, today)
-				except Exception:
-					balance_map[leave_type] = 0
+			balance_map[leave_type] = allocated.get(leave_type, 0)
 
 	# Build result in fixed order (Total computed on frontend)
 	return [{"leave_type": k, "balance": flt(v)} for k, v in balance_map.items()]
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 @rate_limit(limit=5, seconds=60)
 def apply_leave(leave_type, from_date, to_date, half_day=0, reason=""):
 	"""Submit leave application.
@@ -530,6 +859,23 @@ def apply_leave(leave_type, from_date, to_date, half_day=0, reason=""):
 	if not employee:
 		return {"success": False, "error": "Employee not found"}
 
+	# Lock first so two concurrent requests cannot both pass the overlap check
+	_lock_employee(employee)
+	overlapping = frappe.db.sql(
+		"""
+		SELECT name FROM `tabLeave Application`
+		WHERE employee = %s
+		AND status IN ('Open', 'Approved')
+		AND docstatus < 2
+		AND from_date <= %s AND to_date >= %s
+		LIMIT 1
+		FOR UPDATE
+		""",
+		(employee, to_date, from_date),
+	)
+	if overlapping:
+		return {"success": False, "error": f"Overlapping leave exists: {overlapping[0][0]}"}
+
 	# Ensure a submitted Leave Allocation covers the requested dates
 	_ensure_leave_allocation(employee, leave_type, from_date, to_date)
 
@@ -547,7 +893,6 @@ def apply_leave(leave_type, from_date, to_date, half_day=0, reason=""):
 			}
 		)
 		leave.insert(ignore_permissions=True)
-		frappe.db.commit()
 
 		# Notify Manager
 		try:
@@ -567,35 +912,45 @@ def apply_leave(leave_type, from_date, to_date, half_day=0, reason=""):
 
 
 @frappe.whitelist()
-def get_leave_applications():
-	"""Get employee's leave applications"""
+def get_leave_applications(status=None, start=0, page_length=20):
+	"""Get employee's leave applications, newest first.
+
+	Args:
+		status: Optional status filter (e.g. "Open" for the pending tab)
+		start: Offset for pagination
+		page_length: Page size (capped at 100)
+	"""
 	employee = get_current_employee()
 	if not employee:
 		return []
 
-	apps = frappe.get_all(
-		"Leave Application",
-		filters={"employee": employee},
-		fields=["name", "leave_type", "from_date", "to_date", "total_leave_days", "status"],
-		order_by="creation desc",
-		limit=20,
-	)
-
-	# Convert to plain dicts with string dates (handle Frappe Document objects)
-	result = []
-	for app in apps:
-		app_dict = dict(app) if hasattr(app, '__dict__') else app
-		# Convert date objects to ISO strings
-		if hasattr(app_dict.get('from_date'), 'isoformat'):
-			app_dict['from_date'] = app_dict['from_date'].isoformat()
-		if hasattr(app_dict.get('to_date'), 'isoformat'):
-			app_dict['to_date'] = app_dict['to_date'].isoformat()
-		result.append(app_dict)
+	status_condition = "AND status = %(status)s" if status else ""
 
-	return result
+	# Served by the (employee, creation) index — no filesort over the full history.
+	# Dates come back as ISO strings straight from the database.
+	return frappe.db.sql(
+		f"""
+		SELECT name, leave_type,
+			DATE_FORMAT(from_date, '%%Y-%%m-%%d') as from_date,
+			DATE_FORMAT(to_date, '%%Y-%%m-%%d') as to_date,
+			total_leave_days, status
+		FROM `tabLeave Application`
+		WHERE employee = %(employee)s {status_condition}
+		ORDER BY creation DESC
+		LIMIT %(start)s, %(page_length)s
+		""",
+		{
+			"employee": employee,
+			"status": status,
+			# Negative LIMIT values are a MariaDB syntax error
+			"start": max(cint(start), 0),
+			"page_length": max(min(cint(page_length) or 20, 100), 1),
+		},
+		as_dict=True,
+	)
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 def cancel_leave(leave_application):
 	"""Cancel a pending leave application"""
 	employee = get_current_employee()
@@ -603,7 +958,12 @@ def cancel_leave(leave_application):
 		return {"success": False, "error": "Employee not found"}
 
 	try:
-		leave = frappe.get_doc("Leave Application", leave_application)
+		# Locked so an approval cannot land between the status check and the update
+		leave = frappe.db.get_value(
+			"Leave Application", leave_application, ["employee", "status"], as_dict=True, for_update=True
+		)
+		if not leave:
+			return {"success": False, "error": "Leave application not found"}
 
 		if leave.employee != employee:
 			return {"success": False, "error": "Not authorized"}
@@ -611,9 +971,14 @@ def cancel_leave(leave_application):
 		if leave.status != "Open":
 			return {"success": False, "error": "Cannot cancel - leave already processed"}
 
-		leave.status = "Cancelled"
-		leave.save(ignore_permissions=True)
-		frappe.db.commit()
+		# A draft status toggle needs no controller run; sites that hook Leave
+		# Application saves can set ``arijentek_leave_cancel_use_controller``.
+		if frappe.conf.get("arijentek_leave_cancel_use_controller"):
+			doc = frappe.get_doc("Leave Application", leave_application)
+			doc.status = "Cancelled"
+			doc.save(ignore_permissions=True)
+		else:
+			frappe.db.set_value("Leave Application", leave_application, "status", "Cancelled")
 
 		return {"success": True}
 	except Exception as e:
@@ -630,20 +995,19 @@ def get_salary_slips():
 	if not employee:
 		return []
 
-	slips = frappe.get_all(
-		"Salary Slip",
-		filters={"employee": employee, "docstatus": 1},
-		fields=["name", "start_date", "end_date", "net_pay", "gross_pay"],
-		order_by="start_date desc",
-		limit=12,
+	return frappe.db.sql(
+		"""
+		SELECT name, start_date, end_date, net_pay, gross_pay,
+			MONTHNAME(start_date) as month, YEAR(start_date) as year
+		FROM `tabSalary Slip`
+		WHERE employee = %s AND docstatus = 1
+		ORDER BY start_date DESC
+		LIMIT 12
+		""",
+		(employee,),
+		as_dict=True,
 	)
 
-	for slip in slips:
-		slip["month"] = getdate(slip["start_date"]).strftime("%B")
-		slip["year"] = getdate(slip["start_date"]).year
-
-	return slips
-
 
 @frappe.whitelist(allow_guest=False)
 def download_payslip(name):
@@ -667,7 +1031,7 @@ def generate_payroll(month=None, year=None):
 	month: 1-12, year: e.g. 2026. Defaults to previous month.
 	"""
 	user = frappe.session.user
-	if not (frappe.has_permission("Payroll Entry", "create") or "HR Manager" in frappe.get_roles(user)):
+	if not _has_payroll_permission(user):
 		return {"success": False, "error": "Not authorized to generate payroll"}
 
 	from frappe.utils import getdate, get_first_day, get_last_day
@@ -766,12 +1130,10 @@ def generate_my_payslip(month=None, year=None):
 	
 	# Import and call the payslip generator
 	from arijentek_core.payroll.payslip_generator import PayslipGenerator
-	from frappe.utils import get_first_day, get_last_day
 	
 	try:
 		# Get pay period dates
-		start_date = get_first_day(f"{year}-{month:02d}-01")
-		end_date = get_last_day(f"{year}-{month:02d}-01")
+		start_date, end_date = month_bounds(year, month)
 		
 		# Get company
 		company = frappe.db.get_value("Employee", employee, "company")
@@ -809,33 +1171,65 @@ def get_attendance_summary():
 	if not employee:
 		return {}
 
-	today = getdate(nowdate())
-	first_day = get_first_day(today)
-	last_day = get_last_day(today)
+	return _get_attendance_summary(employee)
 
-	summary = frappe.db.sql(
-		"""
-        SELECT status, COUNT(*) as count
-        FROM `tabAttendance`
-        WHERE employee = %s
-        AND attendance_date BETWEEN %s AND %s
-        AND docstatus = 1
-        GROUP BY status
-    """,
-		(employee, first_day, last_day),
-		as_dict=True,
-	)
 
-	result = {"present": 0, "absent": 0, "half_day": 0}
-	for row in summary:
-		if row.status == "Present":
-			result["present"] = row.count
-		elif row.status == "Absent":
-			result["absent"] = row.count
-		elif row.status == "Half Day":
-			result["half_day"] = row.count
+def _get_attendance_summary(employee):
+	"""Current month present / absent / half-day counts for an employee."""
+	today = getdate()
+	first_day, last_day = month_bounds(today.year, today.month)
 
-	return result
+	counts = Counter()
+	for row in _get_monthly_attendance_counts(employee, first_day, last_day):
+		counts[row.status] += row.count
+
+	return {"present": counts["Present"], "absent": counts["Absent"], "half_day": counts["Half Day"]}
+
+
+MONTHLY_ATTENDANCE_CACHE_KEY = "arijentek_monthly_attendance"
+MONTHLY_ATTENDANCE_CACHE_TTL = 60
+
+
+def _get_monthly_attendance_counts(employee, first_day, last_day):
+	"""Submitted Attendance counts grouped by (status, leave_type) for an employee's month.
+
+	Shared by the dashboard and attendance summary, memoised for the request
+	and cached in Redis for a minute; cleared when an Attendance changes.
+	"""
+	key = f"{MONTHLY_ATTENDANCE_CACHE_KEY}:{employee}:{getdate(first_day)}:{getdate(last_day)}"
+	memo = getattr(frappe.local, "arijentek_monthly_attendance", None)
+	if memo is None:
+		memo = frappe.local.arijentek_monthly_attendance = {}
+	if key in memo:
+		return memo[key]
+
+	rows = frappe.cache.get_value(key)
+	if rows is None:
+		rows = frappe.db.sql(
+			"""
+			SELECT status, leave_type, COUNT(*) as count
+			FROM `tabAttendance`
+			WHERE employee = %s
+			AND attendance_date BETWEEN %s AND %s
+			AND docstatus = 1
+			GROUP BY status, leave_type
+			""",
+			(employee, first_day, last_day),
+			as_dict=True,
+		)
+		frappe.cache.set_value(key, rows, expires_in_sec=MONTHLY_ATTENDANCE_CACHE_TTL)
+
+	memo[key] = rows
+	return rows
+
+
+def clear_monthly_attendance_cache(doc, method=None):
+	"""Hook: drop an employee's cached monthly attendance counts when an Attendance changes."""
+	prefix = f"{MONTHLY_ATTENDANCE_CACHE_KEY}:{doc.employee}:"
+	frappe.cache.delete_keys(prefix)
+	memo = getattr(frappe.local, "arijentek_monthly_attendance", {})
+	for key in [k for k in memo if k.startswith(prefix)]:
+		del memo[key]
 
 
 @frappe.whitelist()
@@ -845,8 +1239,6 @@ def get_attendance_records(month=None, year=None):
 	Returns list of records with date, status, working_hours, in_time, out_time
 	plus a summary count.
 	"""
-	import calendar
-
 	employee = get_current_employee()
 	if not employee:
 		return {"records": [], "summary": {}}
@@ -855,13 +1247,17 @@ def get_attendance_records(month=None, year=None):
 	month = int(month) if month else today.month
 	year = int(year) if year else today.year
 
-	last_day = calendar.monthrange(year, month)[1]
-	start_date = getdate(f"{year}-{month:02d}-01")
-	end_date = getdate(f"{year}-{month:02d}-{last_day}")
+	start_date, end_date = month_bounds(year, month)
 
+	# Rows come back display-ready, so they are returned as is
 	records = frappe.db.sql(
 		"""
-		SELECT attendance_date, status, working_hours, in_time, out_time
+		SELECT
+			DATE_FORMAT(attendance_date, '%%Y-%%m-%%d') as date,
+			status,
+			ROUND(COALESCE(working_hours, 0), 2) as working_hours,
+			DATE_FORMAT(in_time, '%%Y-%%m-%%d %%H:%%i:%%s') as in_time,
+			DATE_FORMAT(out_time, '%%Y-%%m-%%d %%H:%%i:%%s') as out_time
 		FROM `tabAttendance`
 		WHERE employee = %s
 			AND attendance_date BETWEEN %s AND %s
@@ -872,21 +1268,14 @@ def get_attendance_records(month=None, year=None):
 		as_dict=True,
 	)
 
+	# At most one row per day, so counting here is cheaper than a second GROUP BY query
 	summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
-	result_records = []
-	for r in records:
-		if r.status in summary:
-			summary[r.status] += 1
-		result_records.append({
-			"date": str(r.attendance_date),
-			"status": r.status,
-			"working_hours": round(flt(r.working_hours), 2),
-			"in_time": str(r.in_time) if r.in_time else None,
-			"out_time": str(r.out_time) if r.out_time else None,
-		})
+	for status, count in Counter(r.status for r in records).items():
+		if status in summary:
+			summary[status] = count
 
 	return {
-		"records": result_records,
+		"records": records,
 		"summary": summary,
 		"period": {"start": str(start_date), "end": str(end_date), "month": month, "year": year},
 	}
@@ -895,7 +1284,7 @@ def get_attendance_records(month=None, year=None):
 # ============ ISSUES ============
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 def create_issue(issue_type, description):
 	"""Create HR issue/ticket"""
 	employee = get_current_employee()
@@ -903,25 +1292,27 @@ def create_issue(issue_type, description):
 		return {"success": False, "error": "Employee not found"}
 
 	try:
-		# Using HD Ticket (Frappe Helpdesk) or Issue
-		doctype = "HD Ticket" if frappe.db.exists("DocType", "HD Ticket") else "Issue"
-
 		doc = frappe.get_doc(
 			{
-				"doctype": doctype,
+				"doctype": _get_issue_doctype(),
 				"subject": f"[{issue_type}] Issue from Employee Portal",
 				"description": description,
 				"raised_by": frappe.session.user,
 			}
 		)
 		doc.insert(ignore_permissions=True)
-		frappe.db.commit()
 
 		return {"success": True, "ticket": doc.name}
 	except Exception as e:
 		return {"success": False, "error": str(e)}
 
 
+@site_cache
+def _get_issue_doctype():
+	"""HD Ticket (Frappe Helpdesk) if installed, else Issue. Memoised per site."""
+	return "HD Ticket" if frappe.db.exists("DocType", "HD Ticket") else "Issue"
+
+
 # ============ REPORTING / MANAGER ============
 
 
@@ -932,12 +1323,17 @@ def get_reporting_info():
 	if not employee:
 		return {}
 
-	emp = frappe.get_doc("Employee", employee)
+	emp = frappe.db.get_value("Employee", employee, ["reports_to", "leave_approver"], as_dict=True)
 	result = {}
 
 	if emp.reports_to:
-		try:
-			manager = frappe.get_doc("Employee", emp.reports_to)
+		manager = frappe.db.get_value(
+			"Employee",
+			emp.reports_to,
+			["name", "employee_name", "designation", "department", "user_id"],
+			as_dict=True,
+		)
+		if manager:
 			result["reporting_manager"] = {
 				"name": manager.name,
 				"employee_name": manager.employee_name,
@@ -945,8 +1341,6 @@ def get_reporting_info():
 				"department": manager.department or "",
 				"user_id": manager.user_id or "",
 			}
-		except Exception:
-			pass
 
 	if emp.leave_approver:
 		try:
@@ -988,18 +1382,23 @@ def get_session_info():
 			"has_desk_access": False,
 		}
 
-	employee = get_current_employee()
-	emp_data = {}
-	if employee:
-		emp_data = frappe.db.get_value(
-			"Employee",
-			employee,
-			["employee_name", "department", "designation"],
-			as_dict=True,
-		) or {}
+	# User type and the linked Employee in one round trip
+	row = frappe.db.sql(
+		"""
+		SELECT u.user_type, e.name as employee, e.employee_name, e.department, e.designation
+		FROM `tabUser` u
+		LEFT JOIN `tabEmployee` e ON e.user_id = u.name
+		WHERE u.name = %s
+		LIMIT 1
+		""",
+		user,
+		as_dict=True,
+	)
+	emp_data = row[0] if row else frappe._dict()
+	employee = emp_data.employee
+	user_type = emp_data.user_type or ""
 
-	user_type = frappe.db.get_value("User", user, "user_type") or ""
-	has_payroll_permission = frappe.has_permission("Payroll Entry", "create") or "HR Manager" in frappe.get_roles(user)
+	has_payroll_permission = _has_payroll_permission(user)
 
 	# Check if is manager (has direct reports)
 	is_manager = False
@@ -1014,9 +1413,9 @@ def get_session_info():
 		"has_payroll_permission": bool(has_payroll_permission),
 		"is_manager": is_manager,
 		"employee": employee,
-		"employee_name": emp_data.get("employee_name", ""),
-		"department": emp_data.get("department", ""),
-		"designation": emp_data.get("designation", ""),
+		"employee_name": emp_data.employee_name or "",
+		"department": emp_data.department or "",
+		"designation": emp_data.designation or "",
 	}
 
 
@@ -1030,25 +1429,31 @@ def _ensure_leave_allocation(employee, leave_type, from_date, to_date):
 	allocations.  The allocation uses the Leave Type's ``max_leaves_allowed``
 	(falls back to 12 days per year).
 	"""
-	# Already covered?
-	covered = frappe.db.sql(
-		"""
-		SELECT name FROM `tabLeave Allocation`
-		WHERE employee = %s AND leave_type = %s
-		AND from_date <= %s AND to_date >= %s
-		AND docstatus = 1
-		LIMIT 1
-		""",
-		(employee, leave_type, from_date, to_date),
-	)
-	if covered:
+	# Already covered? (served by the (employee, leave_type, from_date) index)
+	if frappe.db.exists(
+		"Leave Allocation",
+		{
+			"employee": employee,
+			"leave_type": leave_type,
+			"from_date": ["<=", from_date],
+			"to_date": [">=", to_date],
+			"docstatus": 1,
+		},
+	):
+		return
+
+	lt = frappe.db.get_value("Leave Type", leave_type, ["name", "max_leaves_allowed"], as_dict=True)
+	if not lt:
+		# Let the Leave Application's link validation report the bad leave type
 		return
 
 	year = getdate(from_date).year
-	lt_doc = frappe.get_doc("Leave Type", leave_type)
-	max_leaves = lt_doc.max_leaves_allowed or 12
 
 	try:
+		# Inserted already submitted: one validate + on_submit pass instead of
+		# insert() then submit(). on_submit still runs, since it writes the
+		# Leave Ledger Entry the balance is computed from. Both links were
+		# just checked (employee row is locked by the caller).
 		alloc = frappe.get_doc(
 			{
 				"doctype": "Leave Allocation",
@@ -1056,12 +1461,12 @@ def _ensure_leave_allocation(employee, leave_type, from_date, to_date):
 				"leave_type": leave_type,
 				"from_date": f"{year}-01-01",
 				"to_date": f"{year}-12-31",
-				"new_leaves_allocated": max_leaves,
+				"new_leaves_allocated": lt.max_leaves_allowed or 12,
+				"docstatus": 1,
 			}
 		)
+		alloc.flags.ignore_links = True
 		alloc.insert(ignore_permissions=True)
-		alloc.submit()
-		frappe.db.commit()
 	except Exception as e:
 		# Might fail if an overlapping allocation already exists — that's OK,
 		# the Leave Application validation will catch it with a clearer message.
@@ -1072,9 +1477,65 @@ def _ensure_leave_allocation(employee, leave_type, from_date, to_date):
 # ============ HELPERS ============
 
 
+def _lock_employee(employee):
+	"""Take a row lock on the Employee until the request's transaction ends.
+
+	Used to serialise read-then-write flows (punches, leave applications)
+	for the same employee.
+	"""
+	frappe.db.sql("SELECT name FROM `tabEmployee` WHERE name = %s FOR UPDATE", employee)
+
+
+def _has_payroll_permission(user):
+	"""HR Manager, or Payroll Entry create permission.
+
+	The role check runs first: ``get_roles`` is served from Frappe's per-user
+	cache, so ``has_permission`` is only evaluated for non-HR users.
+	"""
+	return "HR Manager" in frappe.get_roles(user) or frappe.has_permission("Payroll Entry", "create")
+
+
+EMPLOYEE_BY_USER_CACHE_KEY = "arijentek_employee_by_user"
+
+
 def get_current_employee():
-	"""Get employee ID for current user"""
-	return frappe.db.get_value("Employee", {"user_id": frappe.session.user}, "name")
+	"""Get employee ID for current user.
+
+	Memoised on ``frappe.local`` for the rest of the request, backed by Redis
+	(cleared on Employee change), so composite endpoints resolve it once.
+	"""
+	user = frappe.session.user
+	memo = getattr(frappe.local, "arijentek_employee_by_user", None)
+	if memo is None:
+		memo = frappe.local.arijentek_employee_by_user = {}
+	if user not in memo:
+		memo[user] = frappe.cache.hget(
+			EMPLOYEE_BY_USER_CACHE_KEY, user, generator=lambda: _get_employee_for_user(user)
+		)
+	return memo[user]
+
+
+def _get_employee_for_user(user):
+	"""Indexed user_id lookup, without going through the filter-dict query builder."""
+	result = frappe.db.sql("SELECT name FROM `tabEmployee` WHERE user_id = %s LIMIT 1", user)
+	return result[0][0] if result else None
+
+
+def clear_employee_cache(doc, method=None):
+	"""Hook: drop cached user → employee mappings and the holiday list touched by an Employee change."""
+	users = {doc.get("user_id")}
+	previous = doc.get_doc_before_save() if method == "on_update" else None
+	if previous:
+		users.add(previous.get("user_id"))
+
+	memo = getattr(frappe.local, "arijentek_employee_by_user", {})
+	for user in users:
+		if user:
+			frappe.cache.hdel(EMPLOYEE_BY_USER_CACHE_KEY, user)
+			memo.pop(user, None)
+
+	frappe.cache.delete_value(f"{EMPLOYEE_HOLIDAY_LIST_CACHE_KEY}:{doc.name}")
+	getattr(frappe.local, "arijentek_employee_holiday_list", {}).pop(doc.name, None)
 
 
 # ============ PAYROLL SETUP ============
@@ -1125,7 +1586,7 @@ def setup_payroll_for_company():
 def get_payroll_summary(month=None, year=None):
 	"""Get payroll summary for the company. Requires HR Manager or Payroll permission."""
 	user = frappe.session.user
-	if not (frappe.has_permission("Salary Slip", "read") or "HR Manager" in frappe.get_roles(user)):
+	if not ("HR Manager" in frappe.get_roles(user) or frappe.has_permission("Salary Slip", "read")):
 		return {"error": "Not authorized"}
 
 	from arijentek_core.payroll.automation import get_payroll_summary as _get_summary
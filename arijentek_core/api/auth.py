@@ -2,6 +2,10 @@ import frappe
 import re
 from frappe.rate_limiter import rate_limit
 
+_UPPERCASE_RE = re.compile(r"[A-Z]")
+_DIGIT_RE = re.compile(r"\d")
+_SPECIAL_RE = re.compile(r"[!@#$%^&*(),.?\":{}|<>]")
+
 def validate_password_policy(password):
 	"""
 	Enforce strong password policy:
@@ -12,11 +16,11 @@ def validate_password_policy(password):
 	"""
 	if len(password) < 8:
 		return "Password must be at least 8 characters long"
-	if not re.search(r"[A-Z]", password):
+	if not _UPPERCASE_RE.search(password):
 		return "Password must contain at least one uppercase letter"
-	if not re.search(r"\d", password):
+	if not _DIGIT_RE.search(password):
 		return "Password must contain at least one digit"
-	if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+	if not _SPECIAL_RE.search(password):
 		return "Password must contain at least one special character"
 	return None
 
@@ -43,24 +43,20 @@ def submit_expense_claim(expense_type, amount, description, proof=None):
             "claim_date": nowdate()
         })
 
-        if proof:
-            # Handle base64 or uploaded file logic via frappe.get_doc logic if needed
-            # But usually frontend uploads file and sends file_url, OR we use dedicated upload API.
-            # For simplicity, if proof is a file_url (uploaded via /api/method/upload_file), attach it.
-            pass
-
         doc.insert(ignore_permissions=True)
         doc.submit()
         
         # Attach proof if provided (as file_url)
         if proof:
-             # If proof is a file URL, we link it.
-             # Ideally frontend uploads first, gets file URL, then passes it.
-             # We can add an attachment.
-             file_doc = frappe.get_doc("File", {"file_url": proof})
-             file_doc.attached_to_doctype = "Expense Claim"
-             file_doc.attached_to_name = doc.name
-             file_doc.save(ignore_permissions=True)
+            # The frontend uploads first (/api/method/upload_file) and passes the file URL.
+            # Only the link fields change, so update the row directly, in the same transaction.
+            file_name = frappe.db.get_value("File", {"file_url": proof}, "name")
+            if file_name:
+                frappe.db.set_value(
+                    "File",
+                    file_name,
+                    {"attached_to_doctype": "Expense Claim", "attached_to_name": doc.name},
+                )
 
         return {"success": True, "name": doc.name}
 
@@ -74,23 +70,22 @@ def get_team_expenses():
     if not employee:
         return []
         
-    # Get direct reports
-    reports = frappe.get_all("Employee", filters={"reports_to": employee, "status": "Active"}, pluck="name")
-    if not reports:
-        return []
-
-    expenses = frappe.get_all(
-        "Expense Claim",
-        filters={
-            "employee": ["in", reports],
-            "docstatus": 1,  # Submitted claims awaiting approval
-        },
-        fields=["name", "employee_name", "total_claimed_amount", "posting_date", "status", "approval_status"],
-        order_by="posting_date asc"
+    # Submitted, unprocessed claims of active direct reports in one query
+    return frappe.db.sql(
+        """
+        SELECT ec.name, ec.employee_name, ec.total_claimed_amount, ec.posting_date,
+            ec.status, ec.approval_status
+        FROM `tabExpense Claim` ec
+        INNER JOIN `tabEmployee` e ON e.name = ec.employee
+        WHERE e.reports_to = %s
+            AND e.status = 'Active'
+            AND ec.docstatus = 1
+            AND IFNULL(ec.approval_status, '') NOT IN ('Approved', 'Rejected')
+        ORDER BY ec.posting_date ASC
+        """,
+        employee,
+        as_dict=True,
     )
-    
-    # Only return those that haven't been processed yet
-    return [e for e in expenses if e.approval_status not in ["Approved", "Rejected"]]
 
 @frappe.whitelist()
 def process_expense(name, action):
@@ -103,13 +98,17 @@ def process_expense(name, action):
         return {"success": False, "error": "Unauthorized"}
 
     try:
-        doc = frappe.get_doc("Expense Claim", name)
-        
+        # Authorise on scalars first; only load the claim once we know we will update it
+        claim_employee = frappe.db.get_value("Expense Claim", name, "employee")
+        if not claim_employee:
+            return {"success": False, "error": "Expense Claim not found"}
+
         # Verify manager
-        applicant = frappe.db.get_value("Employee", doc.employee, "reports_to")
+        applicant = frappe.get_cached_value("Employee", claim_employee, "reports_to")
         if applicant != employee and "System Manager" not in frappe.get_roles():
              return {"success": False, "error": "Unauthorized"}
-             
+
+        doc = frappe.get_doc("Expense Claim", name)
         if action == "Approve":
             doc.approval_status = "Approved"
             doc.status = "Approved" # Sync status
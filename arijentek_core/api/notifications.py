@@ -6,17 +6,25 @@ def notify_leave_application(doc):
 	if not doc.employee:
 		return
 
-	employee = frappe.get_doc("Employee", doc.employee)
-	if not employee.reports_to:
+	# Employee name and the manager's user in one lookup
+	row = frappe.db.sql(
+		"""
+		SELECT e.employee_name, m.user_id as manager_user
+		FROM `tabEmployee` e
+		INNER JOIN `tabEmployee` m ON m.name = e.reports_to
+		WHERE e.name = %s
+		""",
+		doc.employee,
+		as_dict=True,
+	)
+	if not row or not row[0].manager_user:
 		return
 
-	manager_user = frappe.db.get_value("Employee", employee.reports_to, "user_id")
-	if not manager_user:
-		return
+	employee_name, manager_user = row[0].employee_name, row[0].manager_user
 
-	subject = _("New Leave Application: {0}").format(employee.employee_name)
+	subject = _("New Leave Application: {0}").format(employee_name)
 	message = _("{0} has applied for {1} from {2} to {3}.").format(
-		employee.employee_name, doc.leave_type, doc.from_date, doc.to_date
+		employee_name, doc.leave_type, doc.from_date, doc.to_date
 	)
 	
 	# System Notification
@@ -28,8 +36,8 @@ def notify_leave_application(doc):
 
 def notify_leave_status(doc):
 	"""Notify employee about leave status change"""
-	employee = frappe.get_doc("Employee", doc.employee)
-	if not employee.user_id:
+	user_id = frappe.db.get_value("Employee", doc.employee, "user_id")
+	if not user_id:
 		return
 
 	status = doc.status
@@ -38,7 +46,7 @@ def notify_leave_status(doc):
 		doc.from_date, doc.to_date, status
 	)
 
-	create_system_notification(employee.user_id, subject, message, "Leave Application", doc.name)
+	create_system_notification(user_id, subject, message, "Leave Application", doc.name)
 
 
 def create_system_notification(user, subject, message, ref_doctype, ref_docname):
@@ -1,14 +1,18 @@
 import frappe
 from frappe import _
-from frappe.utils import now_datetime, nowdate
+from frappe.utils import add_days, get_datetime, now_datetime, nowdate
 from frappe.rate_limiter import rate_limit
+from frappe.utils.caching import redis_cache
+from arijentek_core.utils import month_bounds
 
 ATTENDANCE_RATE_LIMIT = 10
 ATTENDANCE_RATE_LIMIT_SECONDS = 60
 MAX_SHIFT_HOURS = 12
+# Client clocks may run slightly ahead of the server
+MAX_FUTURE_SECONDS = 5
 
 
-@frappe.whitelist()
+@frappe.whitelist(methods=["POST"])
 @rate_limit(limit=ATTENDANCE_RATE_LIMIT, seconds=ATTENDANCE_RATE_LIMIT_SECONDS)
 def punch(employee=None, timestamp=None):
 	"""Punch endpoint with enforcement: one IN + one OUT per day, 12hr max."""
@@ -16,30 +20,28 @@ def punch(employee=None, timestamp=None):
 	timestamp = _validate_timestamp(timestamp)
 	today = nowdate()
 
-	# Get today's checkins
-	today_checkins = frappe.db.sql(
+	# First IN / OUT of today as a single row, read from the (employee, time, log_type) index
+	row = frappe.db.sql(
 		"""
-		SELECT time, log_type FROM `tabEmployee Checkin`
-		WHERE employee = %s AND DATE(time) = %s
-		ORDER BY time ASC
+		SELECT
+			MIN(CASE WHEN log_type = 'IN' THEN time END) as in_time,
+			MIN(CASE WHEN log_type = 'OUT' THEN time END) as out_time
+		FROM `tabEmployee Checkin`
+		WHERE employee = %s AND time >= %s AND time < %s
 		""",
-		(employee, today),
+		(employee, today, add_days(today, 1)),
 		as_dict=True,
-	)
-
-	has_in = any(c.log_type == "IN" for c in today_checkins)
-	has_out = any(c.log_type == "OUT" for c in today_checkins)
+	)[0]
 
-	if has_in and has_out:
+	if row.in_time and row.out_time:
 		frappe.throw(_("You have already clocked in and out today"))
 
-	if not has_in:
+	if not row.in_time:
 		log_type = "IN"
-	elif has_in and not has_out:
+	elif not row.out_time:
 		log_type = "OUT"
 		# Enforce max shift duration
-		in_time = next(c.time for c in today_checkins if c.log_type == "IN")
-		hours_worked = (timestamp - in_time).total_seconds() / 3600
+		hours_worked = (timestamp - row.in_time).total_seconds() / 3600
 		if hours_worked > MAX_SHIFT_HOURS:
 			frappe.throw(_(f"Shift exceeded {MAX_SHIFT_HOURS} hours. Please contact HR."))
 	else:
@@ -55,11 +57,7 @@ def punch(employee=None, timestamp=None):
 		}
 	)
 	checkin.insert()
-	frappe.db.commit()
-
-	# Auto-sync attendance after punch
-	from arijentek_core.attendance.auto_attendance import sync_attendance_after_clock
-	sync_attendance_after_clock(employee, timestamp)
+	# Attendance is synced by the Employee Checkin after_insert hook; don't sync again here
 
 	return {"status": "success", "log_type": log_type, "time": str(timestamp), "employee": employee}
 
@@ -67,18 +65,13 @@ def punch(employee=None, timestamp=None):
 @frappe.whitelist()
 @rate_limit(limit=ATTENDANCE_RATE_LIMIT, seconds=ATTENDANCE_RATE_LIMIT_SECONDS)
 def get_status(employee=None):
-	employee = _validate_and_get_employee(employee)
+	from arijentek_core.api import get_last_checkin
 
-	last_checkin = frappe.db.get_all(
-		"Employee Checkin",
-		filters={"employee": employee},
-		fields=["log_type", "time"],
-		order_by="time desc",
-		limit=1,
-	)
+	employee = _validate_and_get_employee(employee)
+	last_checkin = get_last_checkin(employee)
 
 	return {
-		"last_log": {"log_type": last_checkin[0].get("log_type"), "time": str(last_checkin[0].get("time"))}
+		"last_log": {"log_type": last_checkin["log_type"], "time": str(last_checkin["time"])}
 		if last_checkin
 		else None
 	}
@@ -87,76 +80,83 @@ def get_status(employee=None):
 def _validate_and_get_employee(employee=None):
 	if employee:
 		employee = str(employee).strip()[:50]
-		if not frappe.db.exists("Employee", employee):
+		if not _employee_exists(employee):
 			frappe.throw(_("Invalid employee"))
 		return employee
 
-	employee = frappe.db.get_value("Employee", {"user_id": frappe.session.user}, "name")
+	from arijentek_core.api import get_current_employee
+
+	employee = get_current_employee()
 	if not employee:
 		frappe.throw(_("Employee not found for this user"))
 	return employee
 
 
+@redis_cache(ttl=300)
+def _employee_exists(employee):
+	"""Whether an Employee exists; cached briefly since punch/status/dashboard calls repeat it."""
+	return bool(frappe.db.exists("Employee", employee))
+
+
+def clear_employee_exists_cache(doc, method=None, *args, **kwargs):
+	"""Hook: drop cached existence checks when an Employee is deleted or renamed."""
+	_employee_exists.clear_cache()
+
+
 def _validate_timestamp(timestamp=None):
-	if timestamp:
-		try:
-			if isinstance(timestamp, str):
-				from frappe.utils import get_datetime
-
-				timestamp = get_datetime(timestamp)
-			now = now_datetime()
-			max_future_seconds = 5
-			if (timestamp - now).total_seconds() > max_future_seconds:
-				timestamp = now
-			return timestamp
-		except Exception:
-			return now_datetime()
-	return now_datetime()
+	"""Punch time: ``timestamp`` if parseable and not in the future (5s tolerance), else now."""
+	now = now_datetime()
+	if not timestamp:
+		return now
+
+	try:
+		if isinstance(timestamp, str):
+			timestamp = get_datetime(timestamp)
+		return now if (timestamp - now).total_seconds() > MAX_FUTURE_SECONDS else timestamp
+	except Exception:
+		return now
 
 
 @frappe.whitelist()
 def get_dashboard_data():
 	"""Get dashboard data for employee"""
+	from arijentek_core.api import get_last_checkin
+
 	employee = _validate_and_get_employee()
 
-	today = frappe.utils.nowdate()
-	month_start = frappe.utils.get_first_day(frappe.utils.nowdate())
+	now = now_datetime()
+	today = now.date()
+	month_start = frappe.utils.get_first_day(today)
 
-	attendance_summary = frappe.db.sql(
+	rows = frappe.db.sql(
 		"""
 		SELECT status, COUNT(*) as count
 		FROM `tabAttendance`
-		WHERE employee = %s
-			AND attendance_date BETWEEN %s AND %s
+		WHERE employee = %(employee)s
+			AND attendance_date BETWEEN %(month_start)s AND %(today)s
 			AND docstatus = 1
 		GROUP BY status
-	""",
-		(employee, month_start, today),
+		""",
+		{"employee": employee, "month_start": month_start, "today": today},
 		as_dict=True,
 	)
 
 	summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
-	for att in attendance_summary:
-		summary[att.status] = att.count
-
-	last_punch = frappe.db.get_all(
-		"Employee Checkin",
-		filters={"employee": employee},
-		fields=["log_type", "time"],
-		order_by="time desc",
-		limit=1,
-	)
+	for row in rows:
+		summary[row.status] = row.count
 
-	last_punch_data = None
-	if last_punch:
-		last_punch_data = {"log_type": last_punch[0].log_type, "time": str(last_punch[0].time)}
+	# Latest punch from the short-lived cache rather than the checkin table
+	last_checkin = get_last_checkin(employee)
+	last_punch_data = (
+		{"log_type": last_checkin["log_type"], "time": str(last_checkin["time"])} if last_checkin else None
+	)
 
 	return {
 		"employee": employee,
 		"attendance_summary": summary,
 		"last_punch": last_punch_data,
-		"current_month": frappe.utils.now_datetime().strftime("%B"),
-		"year": frappe.utils.now_datetime().year,
+		"current_month": now.strftime("%B"),
+		"year": now.year,
 	}
 
 
@@ -166,33 +166,30 @@ def get_attendance_records(month=None, year=None):
 	employee = _validate_and_get_employee()
 
 	if not month or not year:
-		today = frappe.utils.nowdate()
+		today = frappe.utils.getdate()
 		month = today.month
 		year = today.year
 
-	import calendar
-
-	last_day = calendar.monthrange(year, month)[1]
-	start_date = frappe.utils.getdate(f"{year}-{month:02d}-01")
-	end_date = frappe.utils.getdate(f"{year}-{month:02d}-{last_day}")
+	start_date, end_date = month_bounds(int(year), int(month))
 
+	# Rows are selected in response shape, so they are returned without rebuilding
 	records = frappe.db.sql(
 		"""
-		SELECT attendance_date, status, working_hours, in_time, out_time
+		SELECT
+			DATE_FORMAT(attendance_date, '%%Y-%%m-%%d') as date,
+			status,
+			COALESCE(working_hours, 0) as hours
 		FROM `tabAttendance`
 		WHERE employee = %s
 			AND attendance_date BETWEEN %s AND %s
 			AND docstatus = 1
 		ORDER BY attendance_date
-	""",
+		""",
 		(employee, start_date, end_date),
 		as_dict=True,
 	)
 
 	return {
-		"records": [
-			{"date": str(r.attendance_date), "status": r.status, "hours": r.working_hours or 0}
-			for r in records
-		],
-		"period": {"start": str(start_date), "end": str(end_date)},
+		"records": records,
+		"period": {"start": start_date.isoformat(), "end": end_date.isoformat()},
 	}
@@ -5,6 +5,10 @@ from frappe.rate_limiter import rate_limit
 LOGIN_RATE_LIMIT = 5
 LOGIN_RATE_LIMIT_SECONDS = 60
 
+# Stripped from login input, in this order: removing one pattern can join
+# the text around it into a later one (e.g. "e--val(" -> "eval(" -> "")
+_DANGEROUS_PATTERNS = ("<", ">", "'", '"', "--", ";", "/*", "*/", "eval(", "exec(")
+
 
 @frappe.whitelist(allow_guest=True, methods=["GET"])
 def get_csrf_token():
@@ -27,10 +31,20 @@ def login(usr, pwd):
 	if len(usr) > 140:
 		frappe.throw(_("Invalid username or password"))
 
-	if not frappe.db.exists("User", usr):
-		employee_user = frappe.db.get_value("Employee", {"name": usr, "status": "Active"}, "user_id")
-		if employee_user:
-			usr = employee_user
+	# Accept a User ID, or an active Employee ID mapped to its user, in one query
+	resolved = frappe.db.sql(
+		"""
+		SELECT name, 0 as priority FROM `tabUser` WHERE name = %(usr)s
+		UNION ALL
+		SELECT user_id, 1 as priority FROM `tabEmployee`
+		WHERE name = %(usr)s AND status = 'Active' AND IFNULL(user_id, '') != ''
+		ORDER BY priority
+		LIMIT 1
+		""",
+		{"usr": usr},
+	)
+	if resolved:
+		usr = resolved[0][0]
 
 	try:
 		login_manager = frappe.auth.LoginManager()
@@ -40,18 +54,22 @@ def login(usr, pwd):
 		frappe.clear_messages()
 		frappe.throw(_("Invalid username or password"))
 
-	user = frappe.get_doc("User", frappe.session.user)
+	user = frappe.session.user
 
 	csrf_token = frappe.sessions.get_csrf_token()
 
-	return {"message": "Logged In", "user": user.name, "full_name": user.full_name, "csrf_token": csrf_token}
+	return {
+		"message": "Logged In",
+		"user": user,
+		"full_name": frappe.utils.get_fullname(user),
+		"csrf_token": csrf_token,
+	}
 
 
 def _sanitize_input(value: str) -> str:
 	if not value:
 		return ""
 	value = str(value).strip()
-	dangerous_patterns = ["<", ">", "'", '"', "--", ";", "/*", "*/", "eval(", "exec("]
-	for pattern in dangerous_patterns:
+	for pattern in _DANGEROUS_PATTERNS:
 		value = value.replace(pattern, "")
 	return value[:140]
@@ -8,9 +8,10 @@ records are created (clock in / clock out from the portal).
 Flow:
 1. Employee clocks in  → Employee Checkin (IN) is created
 2. Employee clocks out → Employee Checkin (OUT) is created
-3. On each checkin insert, this module is triggered via doc_events hook
-4. It finds all checkins for that employee on that date and creates/updates
-   the Attendance record accordingly.
+3. On each checkin insert, this module queues a background sync, via the
+   doc_events hook (or directly, for the portal's raw checkin insert)
+4. The job finds all checkins for that employee on that date and
+   creates/updates the Attendance record accordingly.
 
 The attendance is marked as:
 - "Present" on clock-in (with 0 working hours initially)
@@ -25,27 +26,23 @@ from frappe.utils import getdate, add_days
 def on_employee_checkin_insert(doc, method):
 	"""Hook called after Employee Checkin is inserted.
 
-	Automatically creates or updates the Attendance record for the
-	employee on the checkin date.
+	Queues the create / update of the employee's Attendance for the
+	checkin date. This is the single sync path for checkins inserted
+	through the ORM; the portal's raw-insert path enqueues the same job
+	itself (see ``arijentek_core.api._insert_checkin``).
 	"""
 	if not doc.employee or not doc.time:
 		return
 
-	try:
-		checkin_date = getdate(doc.time)
-		_sync_attendance_for_employee(doc.employee, checkin_date)
-	except Exception:
-		# Log the error but don't block the checkin from being saved
-		frappe.log_error(
-			frappe.get_traceback(),
-			f"Auto Attendance Error for {doc.employee}",
-		)
+	enqueue_attendance_sync(doc.employee, doc.time)
 
 
-def _sync_attendance_for_employee(employee, date):
+def _sync_attendance_for_employee(employee, date, auto_commit=False):
 	"""Fetch all checkins for the employee on the given date and create/update attendance.
 
 	Re-uses the existing sync logic from arijentek_core.attendance.sync.
+	Does not commit by default: it runs inside the punch request (or the
+	checkin insert), whose transaction Frappe commits at the end.
 	"""
 	from arijentek_core.attendance.sync import create_or_update_attendance
 
@@ -64,15 +61,14 @@ def _sync_attendance_for_employee(employee, date):
 	if not checkins:
 		return
 
-	create_or_update_attendance(employee, date, checkins)
+	create_or_update_attendance(employee, date, checkins, auto_commit=auto_commit)
 
 
 def sync_attendance_after_clock(employee, checkin_time):
 	"""Convenience function to trigger attendance sync after clock in/out.
 
-	Called directly from the clock_in / clock_out / punch API endpoints
-	as an immediate sync (in addition to the doc_events hook which serves
-	as a safety net).
+	Run as a background job (see ``enqueue_attendance_sync``), once per
+	inserted checkin.
 
 	Args:
 		employee: Employee ID
@@ -86,3 +82,39 @@ def sync_attendance_after_clock(employee, checkin_time):
 			frappe.get_traceback(),
 			f"Auto Attendance Sync Error for {employee}",
 		)
+
+
+def enqueue_attendance_sync(employee, checkin_time):
+	"""Sync attendance for a punch on the short queue, once the punch is committed.
+
+	Keeps the attendance reconciliation (status rules, cancel/resubmit of
+	the day's Attendance) off the punch response path.
+
+	Not deduplicated: Frappe treats a *started* job as a duplicate, so a
+	clock-out landing while the clock-in's sync is running would be
+	dropped. The job is idempotent and cheap, so a second run is harmless.
+	"""
+	frappe.enqueue(
+		"arijentek_core.attendance.auto_attendance.sync_attendance_after_clock",
+		queue="short",
+		job_name=f"attendance-sync-{employee}-{getdate(checkin_time)}",
+		employee=employee,
+		checkin_time=checkin_time,
+		enqueue_after_commit=True,
+	)
+
+
+def sync_attendance_for_pairs(pairs):
+	"""Background job: sync attendance for a list of (employee, date) pairs.
+
+	Enqueued after bulk checkin imports, which bypass the after_insert hook.
+	"""
+	for employee, date in pairs:
+		try:
+			# Commit per pair so one failure does not discard the others
+			_sync_attendance_for_employee(employee, getdate(date), auto_commit=True)
+		except Exception:
+			frappe.log_error(
+				frappe.get_traceback(),
+				f"Auto Attendance Sync Error for {employee}",
+			)
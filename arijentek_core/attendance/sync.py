@@ -1,25 +1,134 @@
+from contextlib import contextmanager
+
 import frappe
 from frappe import _
-from frappe.utils import getdate, add_days, today, get_time
-import calendar
+from frappe.rate_limiter import rate_limit
+from frappe.utils import getdate, add_days, today, flt, cstr, now_datetime
+from itertools import groupby
+
+from arijentek_core.utils import month_bounds
 
 # Allowed roles for manual sync operations
-_ALLOWED_ROLES = ("HR Manager", "System Manager", "Attendance Manager")
+_ALLOWED_ROLES = frozenset(("HR Manager", "System Manager", "Attendance Manager"))
+
+# Default for create_or_update_attendance(existing=...): look the record up
+_LOOKUP = object()
+
+# Job ids of queued sync_date_range runs
+SYNC_RANGE_JOB_PREFIX = "attendance-sync-range:"
+
+# Upper bound on how long a manual sync holds its lock
+SYNC_LOCK_TTL = 300
+
+# Inputs fingerprint of the last sync_attendance_from_checkins per date
+SYNC_WATERMARK_CACHE_KEY = "arijentek_attendance_sync_watermark"
+SYNC_WATERMARK_CACHE_TTL = 24 * 60 * 60
+
+# sync_attendance_from_checkins results
+SYNC_UP_TO_DATE = "up_to_date"
+SYNC_NO_CHECKINS = "no_checkins"
+SYNC_DONE = "synced"
+
+# Employee-days synced per commit in sync_attendance_for_range
+SYNC_COMMIT_BATCH_SIZE = 500
+
+# Existing Attendance fields read by create_or_update_attendance
+_EXISTING_FIELDS = ["name", "docstatus", "status", "working_hours", "in_time", "out_time"]
+
+# Global working-hours policy; applies whether or not the employee has a shift
+PRESENT_HOURS = 8
+HALF_DAY_HOURS = 4
 
 def sync_attendance_from_checkins(employee=None, date=None):
     """
     Sync attendance from employee checkins for a specific date
     Called via: bench execute arijentek_core.attendance.sync.sync_attendance_from_checkins
+
+    Returns {"status": SYNC_UP_TO_DATE | SYNC_NO_CHECKINS | SYNC_DONE, "count": n}.
     """
     if not date:
         date = today()
 
     date = getdate(date)
-    next_date = add_days(date, 1)
 
-    filters = {"time": ["between", [date, next_date]]}
+    # Skip the sync when nothing it reads has changed since the last one
+    watermark_key = f"{SYNC_WATERMARK_CACHE_KEY}:{date}:{employee or '*'}"
+    watermark = _get_sync_watermark(date, employee)
+    if watermark == frappe.cache.get_value(watermark_key):
+        frappe.msgprint(_("Attendance for {0} is already up to date").format(date))
+        return {"status": SYNC_UP_TO_DATE, "count": 0}
+
+    failed = []
+    created_count = sync_attendance_for_range(date, date, employee, failed=failed)
+    # Only a sync that committed and synced every employee-day may short-circuit
+    # the next one; failed days must be retried even if the inputs are unchanged
+    if created_count is not None and not failed:
+        # Checkin and leave parts as read before the sync (so changes made during
+        # it aren't masked); the Attendance part as the sync itself committed it
+        watermark[-1] = _get_sync_watermark(date, employee)[-1]
+        frappe.cache.set_value(watermark_key, watermark, expires_in_sec=SYNC_WATERMARK_CACHE_TTL)
+    if created_count is None:
+        frappe.msgprint(_("No checkins found for {0}").format(date))
+        return {"status": SYNC_NO_CHECKINS, "count": 0}
+
+    frappe.msgprint(_("Created/Updated {0} attendance records").format(created_count))
+    return {"status": SYNC_DONE, "count": created_count}
+
+
+def _get_sync_watermark(date, employee=None):
+    """
+    Fingerprint of the inputs of a day's sync: count and latest modified of
+    the day's checkins (count catches deletions), latest modified of Leave
+    Applications covering the day (half-day leave changes the status), of
+    Employees (default_shift) and Shift Assignments covering the day (the
+    shift decides the half-day leave rule), and of the day's Attendance (a
+    cancelled record must be re-created). Attendance stays last: the caller
+    refreshes that part after the sync.
+    """
+    employee_condition = "AND employee = %(employee)s" if employee else ""
+    name_condition = "WHERE name = %(employee)s" if employee else ""
+    row = frappe.db.sql(
+        f"""
+        SELECT
+            (SELECT COUNT(*) FROM `tabEmployee Checkin`
+                WHERE time >= %(date)s AND time < %(next_date)s {employee_condition}),
+            (SELECT MAX(modified) FROM `tabEmployee Checkin`
+                WHERE time >= %(date)s AND time < %(next_date)s {employee_condition}),
+            (SELECT MAX(modified) FROM `tabLeave Application`
+                WHERE from_date <= %(date)s AND to_date >= %(date)s {employee_condition}),
+            (SELECT MAX(modified) FROM `tabEmployee` {name_condition}),
+            (SELECT MAX(modified) FROM `tabShift Assignment`
+                WHERE start_date <= %(date)s AND (end_date IS NULL OR end_date >= %(date)s)
+                {employee_condition}),
+            (SELECT MAX(modified) FROM `tabAttendance`
+                WHERE attendance_date = %(date)s {employee_condition})
+    """,
+        {"date": date, "next_date": add_days(date, 1), "employee": employee},
+    )[0]
+    return [cstr(v) for v in row]
+
+
+def sync_attendance_for_range(from_date, to_date, employee=None, failed=None):
+    """
+    Create/update attendance for every employee-day with checkins between
+    ``from_date`` and ``to_date`` (inclusive), with one checkin query and one
+    Attendance query for the whole range, committing every
+    SYNC_COMMIT_BATCH_SIZE employee-days.
+    Called via: bench execute arijentek_core.attendance.sync.sync_attendance_for_range
+
+    Returns the number of records created/updated, or None if there were no
+    checkins. Employee-days that failed (rolled back and logged) are appended
+    to ``failed`` as (employee, date) when a list is passed.
+    """
+    from_date = getdate(from_date)
+    to_date = getdate(to_date)
+
+    filters = [
+        ["time", ">=", from_date],
+        ["time", "<", add_days(to_date, 1)],
+    ]
     if employee:
-        filters["employee"] = employee
+        filters.append(["employee", "=", employee])
 
     checkins = frappe.get_all(
         "Employee Checkin",
@@ -29,50 +138,160 @@ def sync_attendance_from_checkins(employee=None, date=None):
     )
 
     if not checkins:
-        frappe.msgprint(_("No checkins found for {0}").format(date))
-        return
+        return None
 
-    employee_checkins = {}
-    for checkin in checkins:
-        if checkin.employee not in employee_checkins:
-            employee_checkins[checkin.employee] = []
-        employee_checkins[checkin.employee].append(checkin)
+    # Existing non-cancelled attendance for everyone in one query, instead of one exists() per employee-day
+    existing_by_key = {
+        (row.employee, getdate(row.attendance_date)): row
+        for row in frappe.get_all(
+            "Attendance",
+            filters={
+                "attendance_date": ["between", [from_date, to_date]],
+                "employee": ["in", list({c.employee for c in checkins})],
+                "docstatus": ["!=", 2],
+            },
+            fields=["employee", "attendance_date", *_EXISTING_FIELDS],
+        )
+    }
+
+    half_day_leave_keys = _get_half_day_leave_keys(
+        list({c.employee for c in checkins}), from_date, to_date
+    )
 
     created_count = 0
-    for emp, logs in employee_checkins.items():
-        result = create_or_update_attendance(emp, date, logs)
+    # Re-synced submitted rows, written together by _update_submitted_attendance
+    updates = []
+    # Checkins are ordered by employee, time, so each employee-day's logs are contiguous
+    for i, (key, logs) in enumerate(groupby(checkins, key=lambda c: (c.employee, getdate(c.time)))):
+        # One employee-day failing (e.g. Attendance validation) rolls back only
+        # itself, not the rest of the batch
+        savepoint = f"attendance_sync_{i}"
+        frappe.db.savepoint(savepoint)
+        try:
+            result = create_or_update_attendance(
+                key[0],
+                key[1],
+                list(logs),
+                existing=existing_by_key.get(key),
+                half_day_leave=key in half_day_leave_keys,
+                updates=updates,
+            )
+        except Exception:
+            frappe.db.rollback(save_point=savepoint)
+            frappe.log_error(
+                frappe.get_traceback(),
+                f"Attendance Sync Error for {key[0]} on {key[1]}",
+            )
+            if failed is not None:
+                failed.append(key)
+            continue
+        frappe.db.release_savepoint(savepoint)
+
         if result:
             created_count += 1
+            # Commit in batches: one per employee-day is slow, one for a
+            # month-long range holds row locks for the whole sync
+            if created_count % SYNC_COMMIT_BATCH_SIZE == 0:
+                _update_submitted_attendance(updates)
+                frappe.db.commit()
 
-    frappe.msgprint(_("Created/Updated {0} attendance records").format(created_count))
+    _update_submitted_attendance(updates)
+    frappe.db.commit()
 
+    return created_count
 
-def create_or_update_attendance(employee, date, checkins, auto_commit=True):
+
+def _get_half_day_leave_keys(employees, from_date, to_date):
+    """
+    (employee, date) pairs in the range where the half-day leave rule of
+    determine_attendance_status applies: employees without a default shift
+    who have an approved half-day Leave Application covering the date.
+    Two queries for the whole batch instead of two per employee-day.
+    """
+    no_shift = frappe.get_all(
+        "Employee",
+        filters={"name": ["in", employees], "default_shift": ["is", "not set"]},
+        pluck="name",
+    )
+    if not no_shift:
+        return set()
+
+    keys = set()
+    for leave in frappe.get_all(
+        "Leave Application",
+        filters={
+            "employee": ["in", no_shift],
+            "half_day": 1,
+            "status": "Approved",
+            "docstatus": 1,
+            "from_date": ["<=", to_date],
+            "to_date": [">=", from_date],
+        },
+        fields=["employee", "from_date", "to_date"],
+    ):
+        day = max(getdate(leave.from_date), from_date)
+        last_day = min(getdate(leave.to_date), to_date)
+        while day <= last_day:
+            keys.add((leave.employee, day))
+            day = add_days(day, 1)
+
+    return keys
+
+
+def create_or_update_attendance(
+    employee,
+    date,
+    checkins,
+    auto_commit=False,
+    existing=_LOOKUP,
+    half_day_leave=_LOOKUP,
+    updates=None,
+):
     """
     Create or update attendance based on checkins.
     
     CRITICAL FIX: Handles submitted documents by cancelling them first.
-    """
-    # Check for non-cancelled existing attendance
-    existing = frappe.db.exists(
-        "Attendance", {"employee": employee, "attendance_date": date, "docstatus": ["!=", 2]}
-    )
 
-    in_logs = [c for c in checkins if c.log_type == "IN"]
-    out_logs = [c for c in checkins if c.log_type == "OUT"]
+    Does not commit unless ``auto_commit`` is set; the caller owns the
+    transaction boundary. Batch callers that already know the day's
+    non-cancelled Attendance pass it as ``existing`` (a row with the
+    _EXISTING_FIELDS, or None if there is none), and whether the half-day leave
+    rule applies as ``half_day_leave``. If they pass an ``updates`` list, the
+    in-place update of a submitted record is appended to it instead of being
+    written, for _update_submitted_attendance to apply in bulk.
 
-    if not in_logs:
+    ``checkins`` must be ordered by time ascending.
+    """
+    # Checkins arrive ordered by time, so the first IN seen is the earliest
+    # and the last OUT seen is the latest
+    first_in = last_out = None
+    for c in checkins:
+        if c.log_type == "IN":
+            if first_in is None:
+                first_in = c
+        elif c.log_type == "OUT":
+            last_out = c
+
+    if not first_in:
         return None
 
-    first_in = min(in_logs, key=lambda x: x.time)
-    last_out = max(out_logs, key=lambda x: x.time) if out_logs else None
+    if existing is _LOOKUP:
+        # Check for non-cancelled existing attendance
+        existing = frappe.db.get_value(
+            "Attendance",
+            {"employee": employee, "attendance_date": date, "docstatus": ["!=", 2]},
+            _EXISTING_FIELDS,
+            as_dict=True,
+        )
 
     working_hours = 0
     if last_out:
         pass  # Calculate via TimeDelta
         working_hours = (last_out.time - first_in.time).total_seconds() / 3600
 
-    status = determine_attendance_status(employee, date, working_hours, first_in)
+    status = determine_attendance_status(
+        employee, date, working_hours, first_in, half_day_leave=half_day_leave
+    )
 
     # Prepare data for the attendance record
     attendance_data = {
@@ -85,28 +304,35 @@ def create_or_update_attendance(employee, date, checkins, auto_commit=True):
         "doctype": "Attendance"
     }
 
-    if existing:
-        existing_doc = frappe.get_doc("Attendance", existing)
-        
+    if existing and existing.docstatus == 1 and _is_unchanged(existing, attendance_data):
+        # Re-sync of a day whose punches haven't changed (range backfills):
+        # nothing to write
+        attendance_name = existing.name
+    elif existing and existing.docstatus == 1:
         # BUG FIX 1: Handle Submitted Document
-        if existing_doc.docstatus == 1:
-            existing_doc.flags.ignore_permissions = True
-            existing_doc.cancel()
-            # After cancelling, we must create a NEW record
-            new_attendance = frappe.new_doc("Attendance")
-            new_attendance.update(attendance_data)
-            new_attendance.insert(ignore_permissions=True)
-            new_attendance.flags.ignore_permissions = True
-            new_attendance.submit()
-            attendance_name = new_attendance.name
+        # Same-day re-sync (e.g. the clock-out after a clock-in): update the
+        # punch-derived fields in place rather than cancelling and re-creating.
+        update = frappe._dict(
+            name=existing.name,
+            employee=employee,
+            status=status,
+            working_hours=attendance_data["working_hours"],
+            in_time=attendance_data["in_time"],
+            out_time=attendance_data["out_time"],
+            previous=existing,
+        )
+        if updates is not None:
+            updates.append(update)
         else:
-            # If Draft (0), just update
-            existing_doc.update(attendance_data)
-            existing_doc.save(ignore_permissions=True)
-            # Submit if needed (Auto Attendance usually submits)
-            existing_doc.flags.ignore_permissions = True
-            existing_doc.submit()
-            attendance_name = existing_doc.name
+            _update_submitted_attendance([update])
+        attendance_name = existing.name
+    elif existing:
+        # If Draft (0), update and submit in a single save (Auto Attendance usually submits)
+        existing_doc = frappe.get_doc("Attendance", existing.name)
+        existing_doc.update(attendance_data)
+        existing_doc.flags.ignore_permissions = True
+        existing_doc.submit()
+        attendance_name = existing_doc.name
     else:
         # Create New
         attendance = frappe.new_doc("Attendance")
@@ -122,111 +348,263 @@ def create_or_update_attendance(employee, date, checkins, auto_commit=True):
     return attendance_name
 
 
-def determine_attendance_status(employee, date, working_hours, first_in):
+def _update_submitted_attendance(updates):
     """
-    Determine attendance status based on shift settings and approved leave.
+    Write the punch-derived fields of submitted Attendance rows with one
+    UPDATE (CASE per column) and empty ``updates``.
+
+    Attendance has no unique key besides ``name`` (cancelled and amended
+    records share employee and date), so this is not an INSERT ... ON
+    DUPLICATE KEY UPDATE.
     """
-    # Check for approved half-day leave on this date
-    has_approved_half_day_leave = frappe.db.exists(
-        "Leave Application",
-        {
-            "employee": employee,
-            "half_day": 1,
-            "status": "Approved",
-            "docstatus": 1,
-            "from_date": ["<=", date],
-            "to_date": [">=", date],
-        },
+    if not updates:
+        return
+
+    columns = ("status", "working_hours", "in_time", "out_time")
+    values = []
+    set_clauses = []
+    for column in columns:
+        set_clauses.append(
+            f"`{column}` = CASE name {' '.join(['WHEN %s THEN %s'] * len(updates))} END"
+        )
+        for u in updates:
+            values.extend((u.name, u[column]))
+
+    frappe.db.sql(
+        f"""
+        UPDATE `tabAttendance`
+        SET {", ".join(set_clauses)}, modified = %s, modified_by = %s
+        WHERE name IN %s
+    """,
+        (*values, now_datetime(), frappe.session.user, [u.name for u in updates]),
+    )
+
+    # Raw UPDATE skips doc_events: keep the audit trail (attendance log and
+    # Version history) and drop the cached monthly counts here
+    from arijentek_core.api import clear_monthly_attendance_cache
+    from arijentek_core.security import log_attendance_event
+
+    timestamp = now_datetime()
+    user = frappe.session.user
+    versions = []
+    for u in updates:
+        log_attendance_event(
+            frappe._dict(doctype="Attendance", name=u.name, employee=u.employee),
+            "on_update_after_submit",
+        )
+        changed = [
+            [column, u.previous.get(column), u[column]]
+            for column in columns
+            if u.previous and u.previous.get(column) != u[column]
+        ]
+        if changed:
+            versions.append((
+                frappe.generate_hash(length=10), user, timestamp, timestamp, user, 0,
+                "Attendance", u.name,
+                frappe.as_json({"changed": changed, "added": [], "removed": [], "row_changed": []}),
+            ))
+
+    frappe.db.bulk_insert(
+        "Version",
+        fields=["name", "owner", "creation", "modified", "modified_by", "docstatus",
+                "ref_doctype", "docname", "data"],
+        values=versions,
     )
 
-    shift_type = frappe.db.get_value("Employee", employee, "default_shift")
-
-    if not shift_type:
-        # No shift assigned — use simple thresholds
-        if has_approved_half_day_leave:
-            return "Half Day"
-        
-        # STRICT THRESHOLDS (User Request):
-        # >= 8 hours: Present
-        # >= 4 hours: Half Day
-        # < 4 hours: Absent
-        if working_hours >= 8:
-            return "Present"
-        elif working_hours >= 4:
-            return "Half Day"
-        
-        return "Absent"
-
-    shift = frappe.get_doc("Shift Type", shift_type)
+    for employee in {u.employee for u in updates}:
+        clear_monthly_attendance_cache(frappe._dict(employee=employee))
+
+    updates.clear()
+
+
+def _is_unchanged(existing, attendance_data):
+    """Whether the stored Attendance already holds the punch-derived values."""
+    return (
+        existing.status == attendance_data["status"]
+        and flt(existing.working_hours, 2) == attendance_data["working_hours"]
+        and existing.in_time == attendance_data["in_time"]
+        and existing.out_time == attendance_data["out_time"]
+    )
+
+
+def determine_attendance_status(employee, date, working_hours, first_in, half_day_leave=_LOOKUP):
+    """
+    Determine attendance status based on shift settings and approved leave.
+
+    ``half_day_leave`` lets batch callers pass the precomputed result of the
+    shift + half-day leave check (see _get_half_day_leave_keys) instead of
+    it being looked up here.
+
+    STRICT THRESHOLDS (User Request - Permanent Fix): Shift Type defaults are
+    ignored and the global policy applies:
+    >= PRESENT_HOURS: Present
+    >= HALF_DAY_HOURS: Half Day
+    otherwise: Absent
+    """
+    if half_day_leave is _LOOKUP:
+        half_day_leave = False
+        # Served from the document cache: called once per punch sync
+        shift_type = frappe.get_cached_value("Employee", employee, "default_shift")
+
+        if not shift_type:
+            # No shift assigned — check for approved half-day leave on this date
+            half_day_leave = bool(
+                frappe.db.exists(
+                    "Leave Application",
+                    {
+                        "employee": employee,
+                        "half_day": 1,
+                        "status": "Approved",
+                        "docstatus": 1,
+                        "from_date": ["<=", date],
+                        "to_date": [">=", date],
+                    },
+                )
+            )
+
+    if half_day_leave:
+        return "Half Day"
 
     # late_entry logic (Reserved for future use)
     # late_entry = False
+    # shift = frappe.get_cached_doc("Shift Type", shift_type)
     # if shift.start_time and first_in:
     #     checkin_time = get_time(first_in.time)
     #     shift_start = get_time(shift.start_time)
     #     grace_minutes = getattr(shift, "late_entry_grace_period", 0) or 0
     #     if ...: late_entry = True
 
-    # STRICT THRESHOLDS (User Request - Permanent Fix):
-    # Ignore Shift Type defaults, enforce global policy:
-    # >= 8 hours: Present
-    # >= 4 hours: Half Day
-    # < 4 hours: Absent
-    
-    if working_hours >= 8:
+    if working_hours >= PRESENT_HOURS:
         return "Present"
-    elif working_hours >= 4:
+    elif working_hours >= HALF_DAY_HOURS:
         return "Half Day"
-    
+
     return "Absent"
 
 
-@frappe.whitelist()
+def _check_sync_permission():
+    if not frappe.has_permission("Attendance", "write"):
+        # Or check specific roles
+        if _ALLOWED_ROLES.isdisjoint(frappe.get_roles()):
+            frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+
+@contextmanager
+def _sync_lock(key, ttl=SYNC_LOCK_TTL):
+    """
+    Redis lock (SET NX EX) so the same sync doesn't run twice concurrently.
+    Yields whether the lock was acquired; the TTL frees it if the worker dies.
+    """
+    key = frappe.cache.make_key(f"arijentek_attendance_sync:{key}")
+    acquired = frappe.cache.set(key, 1, ex=ttl, nx=True)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            frappe.cache.delete(key)
+
+
+_SYNC_RUNNING = {"status": "skipped", "message": "A sync for this period is already running"}
+
+
+@frappe.whitelist(methods=["POST"])
+@rate_limit(limit=5, seconds=60)
 def sync_today_attendance():
     """
     API endpoint to sync today's attendance.
     BUG FIX 3: Added Role Guard.
     """
-    if not frappe.has_permission("Attendance", "write"):
-        frappe.throw(_("Not permitted"), frappe.PermissionError)
+    _check_sync_permission()
 
-    try:
-        sync_attendance_from_checkins()
-        return {"status": "success", "message": "Attendance synced successfully"}
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Attendance Sync Error")
-        return {"status": "error", "message": str(e)}
+    with _sync_lock(f"today:{today()}") as acquired:
+        if not acquired:
+            return _SYNC_RUNNING
 
+        try:
+            result = sync_attendance_from_checkins()
+            if result["status"] == SYNC_UP_TO_DATE:
+                return {"status": SYNC_UP_TO_DATE, "message": "Attendance is already up to date"}
+            return {"status": "success", "message": "Attendance synced successfully"}
+        except Exception as e:
+            frappe.log_error(frappe.get_traceback(), "Attendance Sync Error")
+            return {"status": "error", "message": str(e)}
 
-@frappe.whitelist()
+
+@frappe.whitelist(methods=["POST"])
+@rate_limit(limit=5, seconds=60)
 def sync_date_range(from_date, to_date, employee=None):
     """
     Sync attendance for a date range.
     BUG FIX 3: Added Role Guard.
     BUG FIX 4: Date Range Limit (DoS protection).
+
+    Runs as a job on the long queue; returns its ``job_id`` for
+    get_sync_job_status. Re-requesting a range that is still queued or
+    running returns the same job instead of starting another.
     """
-    if not frappe.has_permission("Attendance", "write"):
-         # Or check specific roles
-         if not any(r in frappe.get_roles() for r in _ALLOWED_ROLES):
-             frappe.throw(_("Not permitted"))
+    _check_sync_permission()
+
+    from_date = getdate(from_date)
+    to_date = getdate(to_date)
+
+    if from_date > to_date:
+        frappe.throw(_("From date cannot be after to date"))
+
+    # BUG FIX 4: Limit range
+    if (to_date - from_date).days > 31:
+        frappe.throw(_("Date range cannot exceed 31 days per request"))
+
+    job_id = f"{SYNC_RANGE_JOB_PREFIX}{from_date}:{to_date}:{employee or '*'}"
+    frappe.enqueue(
+        "arijentek_core.attendance.sync._sync_date_range_worker",
+        queue="long",
+        timeout=3600,
+        job_id=job_id,
+        deduplicate=True,
+        from_date=from_date,
+        to_date=to_date,
+        employee=employee,
+    )
+
+    return {
+        "status": "queued",
+        "message": f"Attendance sync from {from_date} to {to_date} queued",
+        "job_id": job_id,
+    }
 
-    try:
-        from_date = getdate(from_date)
-        to_date = getdate(to_date)
 
-        # BUG FIX 4: Limit range
-        if (to_date - from_date).days > 31:
-            frappe.throw(_("Date range cannot exceed 31 days per request"))
+def _sync_date_range_worker(from_date, to_date, employee=None):
+    """Background job for sync_date_range."""
+    with _sync_lock(f"range:{from_date}:{to_date}:{employee or '*'}") as acquired:
+        if not acquired:
+            return _SYNC_RUNNING
 
-        current_date = from_date
-        while current_date <= to_date:
-            sync_attendance_from_checkins(employee=employee, date=current_date)
-            current_date = add_days(current_date, 1)
+        try:
+            # Whole range in one pass rather than one sync per date
+            created_count = sync_attendance_for_range(from_date, to_date, employee) or 0
+        except Exception as e:
+            frappe.log_error(frappe.get_traceback(), "Attendance Sync Error")
+            return {"status": "error", "message": str(e)}
 
-        return {"status": "success", "message": f"Attendance synced from {from_date} to {to_date}"}
-    except Exception as e:
-        frappe.log_error(frappe.get_traceback(), "Attendance Sync Error")
-        return {"status": "error", "message": str(e)}
+    return {
+        "status": "success",
+        "message": f"Attendance synced from {from_date} to {to_date}",
+        "count": created_count,
+    }
+
+
+@frappe.whitelist()
+def get_sync_job_status(job_id):
+    """Status (queued / started / finished / failed) of a sync_date_range job."""
+    from frappe.utils.background_jobs import get_job_status
+
+    _check_sync_permission()
+
+    if not job_id.startswith(SYNC_RANGE_JOB_PREFIX):
+        frappe.throw(_("Invalid job id"))
+
+    status = get_job_status(job_id)
+    return {"job_id": job_id, "status": status.value if status else None}
 
 
 @frappe.whitelist()
@@ -235,49 +613,115 @@ def get_employee_attendance(employee, month=None, year=None):
     Get attendance summary for employee.
     BUG FIX 5: Object Level Permission Check.
     BUG FIX 2: Crash prevention (NameError).
+
+    Callers that need only the counts or only the rows should use
+    get_employee_attendance_summary / get_employee_attendance_records.
+    """
+    start_date, end_date = _check_access_and_get_period(employee, month, year)
+
+    attendance = _get_attendance_records(employee, start_date, end_date)
+
+    # Summary counted from the fetched rows rather than a second query
+    summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
+    for att in attendance:
+        if att.status in summary:
+            summary[att.status] += 1
+
+    return {
+        "records": attendance,
+        "summary": summary,
+        "period": {"start": str(start_date), "end": str(end_date)},
+    }
+
+
+@frappe.whitelist()
+def get_employee_attendance_summary(employee, month=None, year=None):
+    """
+    Attendance counts by status for the month, without the per-day records.
+    For summary tiles: a GROUP BY returns a handful of rows instead of one per day.
+    """
+    start_date, end_date = _check_access_and_get_period(employee, month, year)
+
+    return {
+        "summary": _get_attendance_summary(employee, start_date, end_date),
+        "period": {"start": str(start_date), "end": str(end_date)},
+    }
+
+
+@frappe.whitelist()
+def get_employee_attendance_records(employee, month=None, year=None):
+    """
+    Per-day attendance records for the month, without the summary.
+    """
+    start_date, end_date = _check_access_and_get_period(employee, month, year)
+
+    return {
+        "records": _get_attendance_records(employee, start_date, end_date),
+        "period": {"start": str(start_date), "end": str(end_date)},
+    }
+
+
+def _check_access_and_get_period(employee, month=None, year=None):
+    """
+    Ensure the session user may view ``employee``'s attendance and return
+    the (start, end) dates of the requested month (default: current).
     """
     # BUG FIX 5: Check ownership
     user = frappe.session.user
-    emp_user_id = frappe.db.get_value("Employee", employee, "user_id")
-    
+    # Document cache: Frappe drops it when the Employee is saved
+    emp_user_id = frappe.get_cached_value("Employee", employee, "user_id")
+
     # Allow if user is the employee OR user has HR Manager role
-    if user != emp_user_id and "HR Manager" not in frappe.get_roles() and "System Manager" not in frappe.get_roles():
-        frappe.throw(_("You are not authorized to view this employee's attendance"))
+    if user != emp_user_id:
+        roles = frappe.get_roles()
+        if "HR Manager" not in roles and "System Manager" not in roles:
+            frappe.throw(_("You are not authorized to view this employee's attendance"))
 
     if not month or not year:
         today_date = getdate()
         month = month or today_date.month
         year = year or today_date.year
-    else:
-        # Ensure int
-        month = int(month)
-        year = int(year)
 
     # BUG FIX 2: Ensure start_date and end_date are defined correctly
-    start_date = getdate(f"{year}-{month:02d}-01")
-    last_day = calendar.monthrange(year, month)[1]
-    end_date = getdate(f"{year}-{month:02d}-{last_day}")
+    return month_bounds(int(year), int(month))
 
-    attendance = frappe.db.sql(
+
+def _get_attendance_summary(employee, start_date, end_date):
+    summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
+    for status, count in frappe.db.sql(
         """
-        SELECT attendance_date, status, working_hours, in_time, out_time
+        SELECT status, COUNT(*)
+        FROM `tabAttendance`
+        WHERE employee = %s
+            AND attendance_date BETWEEN %s AND %s
+            AND docstatus = 1
+        GROUP BY status
+    """,
+        (employee, start_date, end_date),
+    ):
+        if status in summary:
+            summary[status] = count
+    return summary
+
+
+def _get_attendance_records(employee, start_date, end_date):
+    # Dates come back as the strings Frappe's JSON encoder would produce, so
+    # the response needs no per-row conversion; one submitted record per day
+    return frappe.db.sql(
+        """
+        SELECT
+            DATE_FORMAT(attendance_date, '%%Y-%%m-%%d') as attendance_date,
+            status,
+            working_hours,
+            DATE_FORMAT(in_time, '%%Y-%%m-%%d %%H:%%i:%%s') as in_time,
+            DATE_FORMAT(out_time, '%%Y-%%m-%%d %%H:%%i:%%s') as out_time
         FROM `tabAttendance`
         WHERE employee = %s
             AND attendance_date BETWEEN %s AND %s
             AND docstatus = 1
         ORDER BY attendance_date
+        LIMIT 31
     """,
         (employee, start_date, end_date),
         as_dict=True,
     )
-
-    summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
-    for att in attendance:
-        if att.status in summary:
-            summary[att.status] += 1
-
-    return {
-        "records": attendance,
-        "summary": summary,
-        "period": {"start": str(start_date), "end": str(end_date)},
-    }
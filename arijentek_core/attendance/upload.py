@@ -10,14 +10,17 @@ In some v16 setups this can fail silently. This module provides:
 
 import frappe
 from frappe import _
+from frappe.modules import scrub
 from frappe.utils import cstr
+from frappe.utils.csvutils import check_record, import_doc
 
 
-def _import_attendance_rows(rows):
-	"""Process CSV rows and create/update Attendance records. Same logic as HRMS upload_attendance."""
-	from frappe.modules import scrub
-	from frappe.utils.csvutils import check_record, import_doc
+# Rows imported per transaction by the bench command
+IMPORT_CHUNK_SIZE = 500
+
 
+def _prepare_attendance_rows(rows):
+	"""Validate the template and return (columns, data_rows, docstatus_by_name)."""
 	rows = list(filter(lambda x: x and any(x), rows))
 	if len(rows) < 6:
 		frappe.throw(_("CSV must have header row (row 5) and at least one data row"))
@@ -28,13 +31,51 @@ def _import_attendance_rows(rows):
 	data_rows = rows[5:]
 
 	# Remove holiday rows and rows with empty Status (weekends, unmarked days, etc.)
-	def has_valid_status(row):
-		if not row or len(row) <= 4:
-			return False
-		status = (row[4] or "").strip()
-		return status and status != "Holiday"
+	data_rows = [
+		row for row in data_rows if len(row) > 4 and (row[4] or "").strip() not in ("", "Holiday")
+	]
+
+	# docstatus of the rows that update an existing Attendance, in one query
+	names = [row[0] for row in data_rows if row[0]]
+	docstatus_by_name = (
+		dict(
+			frappe.get_all(
+				"Attendance", filters={"name": ["in", names]}, fields=["name", "docstatus"], as_list=True
+			)
+		)
+		if names
+		else {}
+	)
+
+	return columns, data_rows, docstatus_by_name
+
+
+def _import_attendance_row(columns, row, row_idx, docstatus_by_name):
+	"""Import one data row; returns import_doc's message, or None for rows it skips."""
+	d = frappe._dict(zip(columns, row, strict=False))
 
-	data_rows = [row for row in data_rows if has_valid_status(row)]
+	d["doctype"] = "Attendance"
+	# Column 0 is the Attendance name (empty for new records)
+	if row[0]:
+		d["docstatus"] = docstatus_by_name.get(row[0]) or 0
+
+	try:
+		check_record(d)
+		return import_doc(d, "Attendance", 1, row_idx, submit=True)
+	except AttributeError:
+		return None
+
+
+def _row_error(row, row_idx, e):
+	return "Error for row (#%d) %s : %s" % (row_idx, len(row) > 1 and row[1] or "", cstr(e))
+
+
+def _import_attendance_rows(rows):
+	"""Process CSV rows and create/update Attendance records. Same logic as HRMS upload_attendance.
+
+	All or nothing: any failing row rolls the whole import back.
+	"""
+	columns, data_rows, docstatus_by_name = _prepare_attendance_rows(rows)
 
 	ret = []
 	error = False
@@ -43,20 +84,14 @@ def _import_attendance_rows(rows):
 		if not row:
 			continue
 		row_idx = i + 6
-		d = frappe._dict(zip(columns, row, strict=False))
-
-		d["doctype"] = "Attendance"
-		if d.get("name"):
-			d["docstatus"] = frappe.db.get_value("Attendance", d.name, "docstatus") or 0
 
 		try:
-			check_record(d)
-			ret.append(import_doc(d, "Attendance", 1, row_idx, submit=True))
-		except AttributeError:
-			pass
+			msg = _import_attendance_row(columns, row, row_idx, docstatus_by_name)
+			if msg is not None:
+				ret.append(msg)
 		except Exception as e:
 			error = True
-			ret.append("Error for row (#%d) %s : %s" % (row_idx, len(row) > 1 and row[1] or "", cstr(e)))
+			ret.append(_row_error(row, row_idx, e))
 			frappe.errprint(frappe.get_traceback())
 
 	if error:
@@ -67,6 +102,36 @@ def _import_attendance_rows(rows):
 	return {"messages": ret, "error": error}
 
 
+def _import_attendance_rows_chunked(columns, data_rows, docstatus_by_name, chunk_size=IMPORT_CHUNK_SIZE):
+	"""Import prepared rows, committing every ``chunk_size`` rows.
+
+	Unlike ``_import_attendance_rows``, a failing row only rolls back itself
+	(via a savepoint) and is reported; the rest of the file is imported.
+	Yields ``(processed, messages, errors)`` after each chunk is committed.
+	"""
+	for start in range(0, len(data_rows), chunk_size):
+		messages = []
+		errors = []
+		chunk = data_rows[start : start + chunk_size]
+
+		for i, row in enumerate(chunk, start=start):
+			row_idx = i + 6
+			savepoint = f"attendance_row_{row_idx}"
+			frappe.db.savepoint(savepoint)
+			try:
+				msg = _import_attendance_row(columns, row, row_idx, docstatus_by_name)
+				if msg is not None:
+					messages.append(msg)
+			except Exception as e:
+				frappe.db.rollback(save_point=savepoint)
+				errors.append(_row_error(row, row_idx, e))
+			else:
+				frappe.db.release_savepoint(savepoint)
+
+		frappe.db.commit()
+		yield len(chunk), messages, errors
+
+
 @frappe.whitelist()
 def upload_attendance_csv(file_content=None):
 	"""
@@ -1,24 +1,26 @@
 import frappe
 from frappe import _
 from frappe.auth import LoginManager
-from frappe.utils import get_site_url
+from frappe.utils import cint, get_site_url
 
 
 @frappe.whitelist(allow_guest=True)
-def login(usr, pwd):
+def login(usr, pwd, want_csrf=1):
 	"""
 	Custom Login Logic:
 	1. Supports login by Employee ID.
-	2. Returns CSRF Token for SPA dev server.
+	2. Returns CSRF Token for SPA dev server (skipped with ``want_csrf=0``).
 	3. Bypasses CSRF check for guest login endpoint.
 	"""
 
 	# Skip CSRF validation for this guest endpoint
 	frappe.local.flags.ignore_csrf = True
 
-	# 1. Check if username is actually an Employee ID
-	employee_doc = frappe.db.get_value("Employee", {"name": usr, "status": "Active"}, "user_id")
-	actual_usr = employee_doc if employee_doc else usr
+	# 1. Check if username is actually an Employee ID (emails never are, so skip the lookup)
+	actual_usr = usr
+	if "@" not in usr:
+		employee_user = frappe.db.get_value("Employee", {"name": usr, "status": "Active"}, "user_id")
+		actual_usr = employee_user or usr
 
 	# 2. Perform Standard Frappe Authentication
 	login_manager = LoginManager()
@@ -29,7 +31,7 @@ def login(usr, pwd):
 	home_page = "/employee-portal"
 
 	# 4. Generate response with CSRF Token for subsequent requests
-	csrf_token = frappe.sessions.get_csrf_token()
+	csrf_token = frappe.sessions.get_csrf_token() if cint(want_csrf) else None
 
 	# Get site URL for proper origins
 	site_url = get_site_url(frappe.local.site)
@@ -37,7 +39,8 @@ def login(usr, pwd):
 	return {
 		"message": "Logged In",
 		"home_page": home_page,
-		"full_name": frappe.utils.get_fullname(user),
+		# Set by post_login from the User row it already loaded
+		"full_name": login_manager.full_name,
 		"csrf_token": csrf_token,
 		"sid": frappe.session.sid,
 		"site_url": site_url,
@@ -18,7 +18,7 @@ def upload_attendance(context: CliCtxObj, file_path: str):
 
 	  bench --site your-site upload-attendance /path/to/Attendance.csv
 	"""
-	from arijentek_core.attendance.upload import _import_attendance_rows
+	from arijentek_core.attendance.upload import _import_attendance_rows_chunked, _prepare_attendance_rows
 	from frappe.utils.csvutils import read_csv_content
 
 	site = get_site(context)
@@ -36,15 +36,27 @@ def upload_attendance(context: CliCtxObj, file_path: str):
 	frappe.connect()
 
 	try:
-		result = _import_attendance_rows(rows)
-		if result["error"]:
-			click.echo("Import completed with errors:", err=True)
-			for msg in result["messages"]:
-				if "Error" in str(msg):
-					click.echo(f"  {msg}", err=True)
+		columns, data_rows, docstatus_by_name = _prepare_attendance_rows(rows)
+
+		# Committed in chunks: a bad row is reported and skipped instead of
+		# rolling back the whole file
+		imported = 0
+		errors = []
+		with click.progressbar(length=len(data_rows), label="Importing attendance") as bar:
+			for processed, messages, chunk_errors in _import_attendance_rows_chunked(
+				columns, data_rows, docstatus_by_name
+			):
+				imported += len(messages)
+				errors.extend(chunk_errors)
+				bar.update(processed)
+
+		if errors:
+			click.echo(f"Imported {imported} attendance records; {len(errors)} rows failed:", err=True)
+			for msg in errors:
+				click.echo(f"  {msg}", err=True)
 			raise SystemExit(1)
 		else:
-			click.echo(f"Import successful. Processed {len(result['messages'])} attendance records.")
+			click.echo(f"Import successful. Processed {imported} attendance records.")
 	finally:
 		frappe.destroy()
 
@@ -262,15 +262,57 @@ override_whitelisted_methods = {
 }
 
 # --- Request security ---
-before_request = ["arijentek_core.security.validate_request"]
+# patch_hrms_app_permission is a no-op after the first request in a process.
+before_request = [
+	"arijentek_core.patch_hrms_app_permission",
+	"arijentek_core.security.validate_request",
+]
 
-# --- Audit logging ---
+# --- Audit logging / cache invalidation ---
 doc_events = {
 	"Employee Checkin": {
 		"on_submit": "arijentek_core.security.log_attendance_event",
 		"after_insert": "arijentek_core.attendance.auto_attendance.on_employee_checkin_insert",
+		"on_update": "arijentek_core.api.clear_last_checkin_cache",
+		"on_trash": "arijentek_core.api.clear_last_checkin_cache",
+	},
+	"Attendance": {
+		"on_submit": [
+			"arijentek_core.security.log_attendance_event",
+			"arijentek_core.api.clear_monthly_attendance_cache",
+		],
+		"on_cancel": "arijentek_core.api.clear_monthly_attendance_cache",
+		"on_update_after_submit": "arijentek_core.api.clear_monthly_attendance_cache",
+	},
+	"User": {
+		"on_update": "arijentek_core.clear_user_type_cache",
+		"on_trash": "arijentek_core.clear_user_type_cache",
+	},
+	"Employee": {
+		"on_update": [
+			"arijentek_core.api.clear_employee_cache",
+			"arijentek_core.leave_notifications.clear_employee_contact_cache",
+		],
+		"on_trash": [
+			"arijentek_core.api.clear_employee_cache",
+			"arijentek_core.leave_notifications.clear_employee_contact_cache",
+			"arijentek_core.api.v1.attendance.clear_employee_exists_cache",
+		],
+		"after_rename": "arijentek_core.api.v1.attendance.clear_employee_exists_cache",
+	},
+	"Salary Slip": {
+		"on_submit": "arijentek_core.payroll.payslip_generator.enqueue_payslip_pdf",
+		"on_cancel": "arijentek_core.payroll.payslip_generator.clear_payslip_pdf_cache",
+		"on_trash": "arijentek_core.payroll.payslip_generator.clear_payslip_pdf_cache",
+	},
+	"Leave Type": {
+		"on_update": "arijentek_core.api.clear_leave_types_cache",
+		"on_trash": "arijentek_core.api.clear_leave_types_cache",
+	},
+	"Holiday List": {
+		"on_update": "arijentek_core.api.clear_holidays_cache",
+		"on_trash": "arijentek_core.api.clear_holidays_cache",
 	},
-	"Attendance": {"on_submit": "arijentek_core.security.log_attendance_event"},
 	"Leave Application": {
 		"after_insert": "arijentek_core.leave_notifications.on_leave_application_insert",
 		"on_update": "arijentek_core.leave_notifications.on_leave_application_update",
@@ -5,6 +5,8 @@ Creates the "Employee Portal" workspace in the Frappe Desk sidebar with
 shortcuts to the portal and related DocTypes (Holiday List, Leave
 Application, Salary Slip).
 
+Also adds the composite indexes the portal's hot queries rely on.
+
 Runs both:
   - after_install  → first-time setup
   - after_migrate  → re-create if Frappe's orphan cleanup removed it
@@ -24,6 +26,7 @@ def after_install():
 def after_migrate():
 	"""Called after every `bench migrate` (runs *after* orphan cleanup)."""
 	_setup_employee_portal()
+	_clear_resolved_doctypes()
 
 
 # ── Internal helpers ──────────────────────────────────────────────────
@@ -34,9 +37,52 @@ def _setup_employee_portal():
 	_ensure_employee_role()
 	_ensure_module_def()
 	_create_workspace()
+	_ensure_indexes()
 	frappe.db.commit()
 
 
+def _ensure_indexes():
+	"""Add composite indexes used by the portal's per-employee lookups.
+
+	``frappe.db.add_index`` is a no-op when the index already exists, so
+	this is safe to run on every migrate.
+	"""
+	# Session user → employee: WHERE user_id = %s. Not UNIQUE: ERPNext already
+	# rejects duplicate user_ids, and legacy duplicates would make migrate fail.
+	frappe.db.add_index("Employee", ["user_id"], index_name="user_id_index")
+	# Today's punches: WHERE employee = %s AND time >= %s AND time < %s. log_type is
+	# included so the punch/dashboard reads are covered by the index alone.
+	frappe.db.add_index(
+		"Employee Checkin", ["employee", "time", "log_type"], index_name="employee_time_log_type_index"
+	)
+	# Superseded by the covering index above (a prefix of it)
+	if frappe.db.has_index("tabEmployee Checkin", "employee_time_index"):
+		frappe.db.sql_ddl("ALTER TABLE `tabEmployee Checkin` DROP INDEX `employee_time_index`")
+	# All-employee sync: WHERE time >= %s AND time < %s (no employee filter)
+	frappe.db.add_index("Employee Checkin", ["time"], index_name="time_index")
+	# Portal leave list: WHERE employee = %s ORDER BY creation DESC
+	frappe.db.add_index("Leave Application", ["employee", "creation"], index_name="employee_creation_index")
+	# Leave allocation coverage: WHERE employee = %s AND leave_type = %s AND from_date <= %s ...
+	frappe.db.add_index(
+		"Leave Allocation", ["employee", "leave_type", "from_date"], index_name="employee_leave_type_from_date_index"
+	)
+	# Half-day leave checks in attendance sync: WHERE employee = %s AND from_date <= %s AND to_date >= %s
+	frappe.db.add_index(
+		"Leave Application", ["employee", "from_date", "to_date"], index_name="employee_from_date_to_date_index"
+	)
+	# Monthly attendance summaries: WHERE employee = %s AND attendance_date BETWEEN ... AND docstatus = 1
+	frappe.db.add_index(
+		"Attendance", ["employee", "attendance_date", "docstatus"], index_name="employee_date_docstatus_index"
+	)
+
+
+def _clear_resolved_doctypes():
+	"""Forget memoised DocType lookups; a migrate may have installed or removed apps."""
+	from arijentek_core.api import _get_issue_doctype
+
+	_get_issue_doctype.clear_cache()
+
+
 def _ensure_employee_role():
 	"""Make sure the Employee role exists and Website Users with it are
 	properly restricted (desk_access=0 for Website Users via role config
@@ -158,8 +204,11 @@ def _expected_shortcuts():
 		("Leave Application", "#f59e0b"),
 		("Salary Slip", "#8b5cf6"),
 	]
+	present = set(
+		frappe.get_all("DocType", filters={"name": ["in", [dt for dt, _ in doctype_links]]}, pluck="name")
+	)
 	for dt, color in doctype_links:
-		if frappe.db.exists("DocType", dt):
+		if dt in present:
 			shortcuts.append(
 				{
 					"type": "DocType",
@@ -14,8 +14,59 @@ from frappe import _
 from frappe.utils import getdate, get_url
 
 
+EMPLOYEE_CONTACT_CACHE_KEY = "arijentek_employee_contact"
+EMPLOYEE_CONTACT_CACHE_TTL = 10 * 60
+
+LEAVE_EMAIL_TEMPLATE = "arijentek_core/templates/emails/leave_application.html"
+
+
+def _get_employee_contact(employee):
+	"""(user_id, reporting manager's user_id) of an employee; either may be None.
+
+	Every leave event needs one or both, so they are read with one join and
+	cached in Redis. The Employee hook drops the employee's own entry; a
+	manager's user_id change is picked up by the TTL.
+	"""
+	key = f"{EMPLOYEE_CONTACT_CACHE_KEY}:{employee}"
+	contact = frappe.cache.get_value(key)
+	if contact is None:
+		row = frappe.db.sql(
+			"""
+			SELECT e.user_id, mgr.user_id
+			FROM `tabEmployee` e
+			LEFT JOIN `tabEmployee` mgr ON mgr.name = e.reports_to
+			WHERE e.name = %s
+			""",
+			employee,
+		)
+		contact = tuple(row[0]) if row else (None, None)
+		frappe.cache.set_value(key, contact, expires_in_sec=EMPLOYEE_CONTACT_CACHE_TTL)
+
+	return contact
+
+
+def clear_employee_contact_cache(doc, method=None):
+	"""Hook: drop an employee's cached contact users when the Employee changes."""
+	frappe.cache.delete_value(f"{EMPLOYEE_CONTACT_CACHE_KEY}:{doc.name}")
+
+
 def on_leave_application_insert(doc, method=None):
-	"""Notify reporting manager and leave approver when a leave application is created."""
+	"""Notify reporting manager and leave approver when a leave application is created.
+
+	Sent from a short-queue job once the application is committed, so the
+	save doesn't wait on notification inserts and email rendering.
+	"""
+	frappe.enqueue(
+		"arijentek_core.leave_notifications.send_leave_application_notification",
+		queue="short",
+		leave_application=doc.name,
+		enqueue_after_commit=True,
+	)
+
+
+def send_leave_application_notification(leave_application):
+	"""Background job: notify approvers of a new leave application."""
+	doc = frappe.get_doc("Leave Application", leave_application)
 	_send_leave_notification(
 		doc,
 		subject=_("New Leave Application from {0}").format(doc.employee_name),
@@ -54,7 +105,7 @@ def _handle_leave_approval(doc):
 
 		# Notify the employee
 		_notify_user(
-			user=frappe.db.get_value("Employee", doc.employee, "user_id"),
+			user=_get_employee_contact(doc.employee)[0],
 			subject=_("Leave Application Approved"),
 			message=_("Your {0} application ({1} to {2}) has been approved.").format(
 				doc.leave_type, doc.from_date, doc.to_date
@@ -79,7 +130,7 @@ def _handle_leave_rejection(doc):
 	"""
 	try:
 		# Notify the employee
-		employee_user = frappe.db.get_value("Employee", doc.employee, "user_id")
+		employee_user = _get_employee_contact(doc.employee)[0]
 		_notify_user(
 			user=employee_user,
 			subject=_("Leave Application Rejected"),
@@ -104,11 +155,9 @@ def _send_leave_notification(doc, subject, message):
 	recipients = set()
 
 	# Get reporting manager's user_id
-	reports_to = frappe.db.get_value("Employee", doc.employee, "reports_to")
-	if reports_to:
-		mgr_user = frappe.db.get_value("Employee", reports_to, "user_id")
-		if mgr_user:
-			recipients.add(mgr_user)
+	mgr_user = _get_employee_contact(doc.employee)[1]
+	if mgr_user:
+		recipients.add(mgr_user)
 
 	# Get leave approver
 	leave_approver = doc.leave_approver
@@ -128,22 +177,11 @@ def _send_leave_notification(doc, subject, message):
 				recipients.add(u.parent)
 
 	# Send desk notifications
-	for user in recipients:
+	if recipients:
 		try:
-			# Frappe desk notification
-			notification = frappe.new_doc("Notification Log")
-			notification.update({
-				"subject": subject,
-				"email_content": message,
-				"for_user": user,
-				"document_type": "Leave Application",
-				"document_name": doc.name,
-				"from_user": frappe.session.user,
-				"type": "Alert",
-			})
-			notification.insert(ignore_permissions=True)
+			_bulk_insert_notification_logs(recipients, subject, message, doc)
 		except Exception:
-			frappe.log_error(frappe.get_traceback(), f"Leave Notification Error for {user}")
+			frappe.log_error(frappe.get_traceback(), "Leave Notification Error")
 
 	# Send email notification
 	if recipients:
@@ -154,13 +192,43 @@ def _send_leave_notification(doc, subject, message):
 				message=_build_email_html(doc, message),
 				reference_doctype="Leave Application",
 				reference_name=doc.name,
-				now=True,
 			)
 		except Exception:
 			# Email failure should not block the workflow
 			frappe.log_error(frappe.get_traceback(), "Leave Notification Email Error")
 
-	frappe.db.commit()
+
+def _bulk_insert_notification_logs(users, subject, message, doc):
+	"""Write one Notification Log per user with a single multi-row INSERT.
+
+	The Notification Log controller is skipped, so its side effects that
+	matter here (bell refresh, unread dot) are applied per user afterwards.
+	Its notification email is not sent: the caller emails the same users.
+	"""
+	from frappe.desk.doctype.notification_log.notification_log import set_notifications_as_unseen
+
+	now = frappe.utils.now_datetime()
+	from_user = frappe.session.user
+	frappe.db.bulk_insert(
+		"Notification Log",
+		fields=[
+			"name", "owner", "creation", "modified", "modified_by",
+			"subject", "email_content", "for_user", "document_type", "document_name",
+			"from_user", "type", "read",
+		],
+		values=[
+			(
+				frappe.generate_hash(length=10), from_user, now, now, from_user,
+				subject, message, user, "Leave Application", doc.name,
+				from_user, "Alert", 0,
+			)
+			for user in users
+		],
+	)
+
+	for user in users:
+		frappe.publish_realtime("notification", after_commit=True, user=user)
+		set_notifications_as_unseen(user)
 
 
 def _notify_user(user, subject, message, doc):
@@ -187,39 +255,12 @@ def _notify_user(user, subject, message, doc):
 
 def _build_email_html(doc, message):
 	"""Build a clean HTML email for leave notification."""
-	portal_url = get_url("/app/leave-application/" + doc.name)
-	return f"""
-	<div style="font-family: 'Inter', sans-serif; max-width: 560px; margin: 0 auto;">
-		<div style="background: #f8fafc; border-radius: 12px; padding: 24px; border: 1px solid #e2e8f0;">
-			<h2 style="color: #0f172a; margin: 0 0 16px 0; font-size: 18px;">Leave Application</h2>
-			<p style="color: #475569; margin: 0 0 16px 0; font-size: 14px; line-height: 1.6;">{message}</p>
-			<table style="width: 100%; border-collapse: collapse; margin: 16px 0;">
-				<tr>
-					<td style="padding: 8px 0; color: #64748b; font-size: 13px;">Employee</td>
-					<td style="padding: 8px 0; color: #0f172a; font-size: 13px; font-weight: 600;">{doc.employee_name}</td>
-				</tr>
-				<tr>
-					<td style="padding: 8px 0; color: #64748b; font-size: 13px;">Leave Type</td>
-					<td style="padding: 8px 0; color: #0f172a; font-size: 13px; font-weight: 600;">{doc.leave_type}</td>
-				</tr>
-				<tr>
-					<td style="padding: 8px 0; color: #64748b; font-size: 13px;">Period</td>
-					<td style="padding: 8px 0; color: #0f172a; font-size: 13px; font-weight: 600;">{doc.from_date} to {doc.to_date}</td>
-				</tr>
-				<tr>
-					<td style="padding: 8px 0; color: #64748b; font-size: 13px;">Days</td>
-					<td style="padding: 8px 0; color: #0f172a; font-size: 13px; font-weight: 600;">{doc.total_leave_days}</td>
-				</tr>
-				<tr>
-					<td style="padding: 8px 0; color: #64748b; font-size: 13px;">Half Day</td>
-					<td style="padding: 8px 0; color: #0f172a; font-size: 13px; font-weight: 600;">{"Yes" if doc.half_day else "No"}</td>
-				</tr>
-			</table>
-			<a href="{portal_url}"
-			   style="display: inline-block; background: #0d9488; color: white; padding: 10px 24px;
-			          border-radius: 8px; text-decoration: none; font-size: 14px; font-weight: 600; margin-top: 8px;">
-				Review Application
-			</a>
-		</div>
-	</div>
-	"""
+	# Rendered by path so Jinja compiles the template once per process
+	return frappe.render_template(
+		LEAVE_EMAIL_TEMPLATE,
+		{
+			"doc": doc,
+			"message": message,
+			"portal_url": get_url("/app/leave-application/" + doc.name),
+		},
+	)
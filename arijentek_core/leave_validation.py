@@ -1,13 +1,16 @@
 import frappe
 from frappe.utils import getdate, today
 
+# Roles allowed to apply leave for past months (data correction)
+_BYPASS_ROLES = frozenset(("HR Manager", "System Manager"))
+
 def validate_leave_date(doc, method):
     """
     Validate that leave is not applied for a past month.
     Rule: Employees can only apply for the current month or future months.
     """
     # Allow HR Managers to bypass this restriction for data correction
-    if "HR Manager" in frappe.get_roles() or "System Manager" in frappe.get_roles():
+    if not _BYPASS_ROLES.isdisjoint(frappe.get_roles()):
         return
 
     # Skip validation if status is Rejected or Cancelled
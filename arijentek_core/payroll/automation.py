@@ -11,9 +11,14 @@ Integrates with ERPNext's payroll system and extends it with:
 
 import frappe
 from frappe import _
-from frappe.utils import getdate, add_months, get_first_day, get_last_day, flt
+from frappe.utils import getdate, add_months, get_first_day, get_last_day, flt, cint
 from arijentek_core.payroll.payslip_generator import PayslipGenerator, generate_payroll_for_month
-from arijentek_core.payroll.calculator import PayrollCalculator, get_lop_summary
+from arijentek_core.payroll.calculator import (
+	PayrollCalculator,
+	get_attendance_counts,
+	lop_summary_from_counts,
+)
+from arijentek_core.utils import month_bounds
 
 
 def generate_monthly_payroll(company=None, payroll_period=None, posting_date=None, dry_run=False):
@@ -52,7 +57,7 @@ def generate_monthly_payroll(company=None, payroll_period=None, posting_date=Non
 		return None
 
 	# Generate payslips
-	result = generator.generate_all_payslips(submit=not dry_run)
+	result = generator.generate_all_payslips(employees=employees, submit=not dry_run)
 
 	if dry_run:
 		return {
@@ -200,8 +205,7 @@ def get_payroll_status(employee, month=None, year=None):
 		month = month or today.month
 		year = year or today.year
 
-	start_date = getdate(f"{year}-{month:02d}-01")
-	end_date = get_last_day(start_date)
+	start_date, end_date = month_bounds(cint(year), cint(month))
 
 	salary_slip = frappe.db.get_value(
 		"Salary Slip",
@@ -210,8 +214,12 @@ def get_payroll_status(employee, month=None, year=None):
 		as_dict=True,
 	)
 
-	attendance_summary = get_attendance_summary(employee, start_date, end_date)
-	lop_summary = get_lop_summary(employee, start_date, end_date)
+	# Status summary and LOP from one Attendance scan
+	counts = get_attendance_counts(employee, start_date, end_date)
+	attendance_summary = {}
+	for row in counts:
+		attendance_summary[row.status] = attendance_summary.get(row.status, 0) + row.count
+	lop_summary = lop_summary_from_counts(counts)
 
 	return {
 		"salary_slip": salary_slip,
@@ -268,8 +276,7 @@ def get_payroll_preview_for_employee(employee, month=None, year=None):
 		month = month or today.month
 		year = year or today.year
 
-	start_date = getdate(f"{year}-{month:02d}-01")
-	end_date = get_last_day(start_date)
+	start_date, end_date = month_bounds(cint(year), cint(month))
 
 	calculator = PayrollCalculator(employee, start_date, end_date)
 	return calculator.calculate_payroll()
@@ -289,8 +296,7 @@ def recalculate_payroll_for_employee(employee, month, year):
 	Returns:
 		Dictionary with recalculated payroll
 	"""
-	start_date = getdate(f"{year}-{month:02d}-01")
-	end_date = get_last_day(start_date)
+	start_date, end_date = month_bounds(cint(year), cint(month))
 
 	# Check for existing salary slip
 	existing_slip = frappe.db.get_value(
@@ -334,7 +340,107 @@ def recalculate_payroll_for_employee(employee, month, year):
 
 
 @frappe.whitelist()
-def get_payroll_summary(company=None, month=None, year=None):
+def recalculate_payroll_bulk(employees, month, year):
+	"""
+	Recalculate payroll for several employees at once (e.g. after a bulk
+	attendance correction). Bulk variant of recalculate_payroll_for_employee.
+
+	Each employee's old slip is replaced inside a savepoint, so an employee
+	whose new slip fails to generate keeps the old one.
+
+	Args:
+		employees: List (or JSON list) of Employee IDs
+		month: Month (1-12)
+		year: Year
+
+	Returns:
+		Dictionary with created and failed slips
+	"""
+	for ptype in ("create", "cancel", "delete"):
+		if not frappe.has_permission("Salary Slip", ptype):
+			frappe.throw(_("Not permitted"), frappe.PermissionError)
+
+	employees = frappe.parse_json(employees) if isinstance(employees, str) else employees
+	if not employees:
+		return {"created": [], "failed": [], "total_created": 0, "total_failed": 0}
+
+	start_date, end_date = month_bounds(cint(year), cint(month))
+
+	company_by_employee = dict(
+		frappe.get_all(
+			"Employee", filters={"name": ["in", employees]}, fields=["name", "company"], as_list=True
+		)
+	)
+
+	# Existing slips for all employees in one query
+	slips_by_employee = {}
+	for slip in frappe.get_all(
+		"Salary Slip",
+		filters={
+			"employee": ["in", employees],
+			"start_date": start_date,
+			"end_date": end_date,
+			"docstatus": ["!=", 2],
+		},
+		fields=["name", "employee", "docstatus"],
+	):
+		slips_by_employee.setdefault(slip.employee, []).append(slip)
+
+	# One generator per company rather than one per employee
+	generators = {}
+	failed = []
+	for i, employee in enumerate(employees):
+		company = company_by_employee.get(employee)
+		if not company:
+			failed.append({"employee": employee, "error": _("Employee {0} not found").format(employee)})
+			continue
+		if company not in generators:
+			generators[company] = PayslipGenerator(company, start_date, end_date)
+
+		savepoint = f"recalculate_payroll_{i}"
+		frappe.db.savepoint(savepoint)
+		try:
+			for slip in slips_by_employee.get(employee, []):
+				if slip.docstatus == 1:
+					# Submitted slip - need to cancel first
+					frappe.get_doc("Salary Slip", slip.name).cancel()
+				frappe.delete_doc("Salary Slip", slip.name)
+		except Exception as e:
+			frappe.db.rollback(save_point=savepoint)
+			failed.append({"employee": employee, "error": str(e)})
+			frappe.log_error(
+				frappe.get_traceback(),
+				_("Payroll Recalculation Error - {0}").format(employee),
+			)
+			continue
+
+		generator = generators[company]
+		if generator.generate_payslip(employee):
+			frappe.db.release_savepoint(savepoint)
+		else:
+			# Restore the old slip. This also rolls back the Error Log the
+			# generator wrote, so log its recorded failure again.
+			frappe.db.rollback(save_point=savepoint)
+			frappe.log_error(
+				generator.failed_employees[-1]["error"] if generator.failed_employees else None,
+				_("Payslip Generation Error - {0}").format(employee),
+			)
+
+	created = []
+	for generator in generators.values():
+		created.extend(generator.created_slips)
+		failed.extend(generator.failed_employees)
+
+	return {
+		"created": created,
+		"failed": failed,
+		"total_created": len(created),
+		"total_failed": len(failed),
+	}
+
+
+@frappe.whitelist()
+def get_payroll_summary(company=None, month=None, year=None, include_slips=1):
 	"""
 	Get payroll summary for a company and period.
 
@@ -342,6 +448,7 @@ def get_payroll_summary(company=None, month=None, year=None):
 		company: Company name
 		month: Month (1-12)
 		year: Year
+		include_slips: Also return the individual slips (default 1)
 
 	Returns:
 		Dictionary with payroll summary statistics
@@ -354,54 +461,67 @@ def get_payroll_summary(company=None, month=None, year=None):
 		month = month or today.month
 		year = year or today.year
 
-	start_date = getdate(f"{year}-{month:02d}-01")
-	end_date = get_last_day(start_date)
+	start_date, end_date = month_bounds(cint(year), cint(month))
+	params = (company, start_date, end_date)
 
-	# Get salary slips for the period
-	slips = frappe.db.sql(
+	# Department breakdown and grand totals aggregated by the database; the
+	# WITH ROLLUP row (dept NULL) carries the totals
+	totals = frappe._dict(count=0, gross_pay=0, net_pay=0, deductions=0)
+	dept_breakdown = {}
+	for row in frappe.db.sql(
 		"""
-		SELECT 
-			name, employee, employee_name, department,
-			gross_pay, net_pay, total_deduction,
-			working_days, payment_days
+		SELECT
+			COALESCE(department, 'Unassigned') as dept,
+			COUNT(*) as count,
+			SUM(gross_pay) as gross_pay,
+			SUM(net_pay) as net_pay,
+			SUM(total_deduction) as deductions
 		FROM `tabSalary Slip`
 		WHERE company = %s
 			AND start_date = %s
 			AND end_date = %s
 			AND docstatus = 1
+		GROUP BY dept WITH ROLLUP
 		""",
-		(company, start_date, end_date),
+		params,
 		as_dict=True,
-	)
-
-	# Calculate totals
-	total_gross = sum(flt(s.gross_pay) for s in slips)
-	total_net = sum(flt(s.net_pay) for s in slips)
-	total_deductions = sum(flt(s.total_deduction) for s in slips)
-
-	# Get department breakdown
-	dept_breakdown = {}
-	for slip in slips:
-		dept = slip.department or "Unassigned"
-		if dept not in dept_breakdown:
-			dept_breakdown[dept] = {
-				"count": 0,
-				"gross_pay": 0,
-				"net_pay": 0,
-				"deductions": 0,
-			}
-		dept_breakdown[dept]["count"] += 1
-		dept_breakdown[dept]["gross_pay"] += flt(slip.gross_pay)
-		dept_breakdown[dept]["net_pay"] += flt(slip.net_pay)
-		dept_breakdown[dept]["deductions"] += flt(slip.total_deduction)
+	):
+		values = {
+			"count": row.count,
+			"gross_pay": flt(row.gross_pay),
+			"net_pay": flt(row.net_pay),
+			"deductions": flt(row.deductions),
+		}
+		if row.dept is None:
+			totals.update(values)
+		else:
+			dept_breakdown[row.dept] = values
+
+	slips = []
+	if cint(include_slips):
+		slips = frappe.db.sql(
+			"""
+			SELECT
+				name, employee, employee_name, department,
+				gross_pay, net_pay, total_deduction,
+				working_days, payment_days
+			FROM `tabSalary Slip`
+			WHERE company = %s
+				AND start_date = %s
+				AND end_date = %s
+				AND docstatus = 1
+			""",
+			params,
+			as_dict=True,
+		)
 
 	return {
 		"company": company,
 		"period": {"month": month, "year": year, "start": str(start_date), "end": str(end_date)},
-		"total_employees": len(slips),
-		"total_gross_pay": flt(total_gross, 2),
-		"total_net_pay": flt(total_net, 2),
-		"total_deductions": flt(total_deductions, 2),
+		"total_employees": totals.count,
+		"total_gross_pay": flt(totals.gross_pay, 2),
+		"total_net_pay": flt(totals.net_pay, 2),
+		"total_deductions": flt(totals.deductions, 2),
 		"department_breakdown": dept_breakdown,
 		"slips": slips,
 	}
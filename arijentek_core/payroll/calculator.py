@@ -19,18 +19,21 @@ import calendar
 
 from datetime import date
 
+from arijentek_core.utils import month_bounds
+
 
 class PayrollCalculator:
 	"""
 	Calculates payroll for an employee based on attendance and salary structure.
 	"""
 
-	def __init__(self, employee, start_date, end_date):
+	def __init__(self, employee, start_date, end_date, salary_structure_assignment=None):
 		self.employee = employee
 		self.start_date = getdate(start_date)
 		self.end_date = getdate(end_date)
 		self.employee_doc = frappe.get_doc("Employee", employee)
-		self.salary_structure_assignment = None
+		# Optional preloaded assignment (name, salary_structure, base, variable)
+		self.salary_structure_assignment = salary_structure_assignment
 		self.salary_structure = None
 		self.attendance_data = []
 		self.holidays = []
@@ -48,6 +51,12 @@ class PayrollCalculator:
 
 	def _load_salary_structure(self):
 		"""Load employee's salary structure assignment and structure."""
+		if self.salary_structure_assignment:
+			self.salary_structure = frappe.get_doc(
+				"Salary Structure", self.salary_structure_assignment.salary_structure
+			)
+			return
+
 		ssa = frappe.db.get_value(
 			"Salary Structure Assignment",
 			{
@@ -602,8 +611,7 @@ def get_payroll_preview(employee, month, year):
 	month = cint(month)
 	year = cint(year)
 
-	start_date = getdate(f"{year}-{month:02d}-01")
-	end_date = getdate(f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]}")
+	start_date, end_date = month_bounds(year, month)
 
 	return calculate_employee_payroll(employee, start_date, end_date)
 
@@ -615,33 +623,44 @@ def get_lop_summary(employee, start_date, end_date):
 	Returns:
 		Dictionary with LOP days, half day LOP, and total LOP equivalent
 	"""
-	lop_leave_types = frappe.db.sql_list(
-		"""SELECT name FROM `tabLeave Type` WHERE is_lwp = 1"""
-	)
+	return lop_summary_from_counts(get_attendance_counts(employee, start_date, end_date))
 
-	attendance = frappe.db.sql(
+
+def get_attendance_counts(employee, start_date, end_date):
+	"""
+	Submitted Attendance counts for the period by status and leave type,
+	with the leave type's ``is_lwp`` flag joined in.
+
+	One scan that serves both the status summary and the LOP summary, so
+	callers that need both don't query Attendance twice.
+	"""
+	return frappe.db.sql(
 		"""
-		SELECT status, leave_type, COUNT(*) as count
-		FROM `tabAttendance`
-		WHERE employee = %s
-			AND attendance_date BETWEEN %s AND %s
-			AND docstatus = 1
-		GROUP BY status, leave_type
+		SELECT a.status, a.leave_type, IFNULL(lt.is_lwp, 0) as is_lwp, COUNT(*) as count
+		FROM `tabAttendance` a
+		LEFT JOIN `tabLeave Type` lt ON lt.name = a.leave_type
+		WHERE a.employee = %s
+			AND a.attendance_date BETWEEN %s AND %s
+			AND a.docstatus = 1
+		GROUP BY a.status, a.leave_type, lt.is_lwp
 		""",
 		(employee, start_date, end_date),
 		as_dict=True,
 	)
 
+
+def lop_summary_from_counts(attendance):
+	"""LOP summary from ``get_attendance_counts`` rows."""
 	lop_days = 0
 	half_day_lop = 0
 
 	for att in attendance:
 		if att.status == "Absent":
 			lop_days += att.count
-		elif att.status == "On Leave" and att.leave_type in lop_leave_types:
+		elif att.status == "On Leave" and att.is_lwp:
 			lop_days += att.count
 		elif att.status == "Half Day":
-			if att.leave_type in lop_leave_types:
+			if att.is_lwp:
 				half_day_lop += att.count
 				lop_days += 0.5 * att.count
 
@@ -14,8 +14,16 @@ attendance-based calculations.
 import frappe
 from frappe import _
 from frappe.utils import getdate, get_first_day, get_last_day, flt, cint, now_datetime, money_in_words
-import calendar
-from arijentek_core.payroll.calculator import PayrollCalculator, get_lop_summary
+import hashlib
+import os
+import shutil
+import tempfile
+from arijentek_core.payroll.calculator import (
+	PayrollCalculator,
+	get_attendance_counts,
+	lop_summary_from_counts,
+)
+from arijentek_core.utils import month_bounds
 
 
 class PayslipGenerator:
@@ -36,11 +44,17 @@ class PayslipGenerator:
 		1. Active employees
 		2. With salary structure assignment
 		3. Joined on or before the pay period end date
+
+		Each row also carries the employee's latest assignment (ssa_name,
+		salary_structure, base, variable, from_date) so generate_payslip
+		doesn't have to look it up again.
 		"""
-		employees = frappe.db.sql(
+		rows = frappe.db.sql(
 			"""
-			SELECT DISTINCT e.name, e.employee_name, e.department, e.designation,
-				e.date_of_joining, e.relieving_date
+			SELECT e.name, e.employee_name, e.department, e.designation,
+				e.date_of_joining, e.relieving_date,
+				ssa.name AS ssa_name, ssa.salary_structure, ssa.base, ssa.variable,
+				ssa.from_date
 			FROM `tabEmployee` e
 			INNER JOIN `tabSalary Structure Assignment` ssa
 				ON ssa.employee = e.name
@@ -52,21 +66,27 @@ class PayslipGenerator:
 				AND ssa.from_date <= %s
 				AND (e.date_of_joining IS NULL OR e.date_of_joining <= %s)
 				AND (e.relieving_date IS NULL OR e.relieving_date >= %s)
-			ORDER BY e.name
+			ORDER BY e.name, ssa.from_date DESC
 			""",
 			(self.company, self.end_date, self.end_date, self.start_date),
 			as_dict=True,
 		)
 
-		return employees
+		# Keep only the latest assignment per employee
+		employees = {}
+		for row in rows:
+			employees.setdefault(row.name, row)
+
+		return list(employees.values())
 
-	def generate_payslip(self, employee, submit=False):
+	def generate_payslip(self, employee, submit=False, preloaded=None):
 		"""
 		Generate a salary slip for an employee.
 
 		Args:
 			employee: Employee ID
 			submit: Whether to submit the salary slip after creation
+			preloaded: Row from get_eligible_employees (skips the assignment lookup)
 
 		Returns:
 			Salary Slip document or None if failed
@@ -90,7 +110,18 @@ class PayslipGenerator:
 				return frappe.get_doc("Salary Slip", existing)
 
 			# Calculate payroll using our calculator
-			calculator = PayrollCalculator(employee, self.start_date, self.end_date)
+			ssa = None
+			if preloaded and preloaded.get("ssa_name"):
+				ssa = frappe._dict(
+					name=preloaded.ssa_name,
+					salary_structure=preloaded.salary_structure,
+					base=preloaded.base,
+					variable=preloaded.variable,
+				)
+
+			calculator = PayrollCalculator(
+				employee, self.start_date, self.end_date, salary_structure_assignment=ssa
+			)
 			payroll_data = calculator.calculate_payroll()
 
 			# Create Salary Slip
@@ -166,7 +197,8 @@ class PayslipGenerator:
 		Generate salary slips for all eligible employees.
 
 		Args:
-			employees: List of employee IDs (optional, defaults to all eligible)
+			employees: List of employee IDs or get_eligible_employees rows
+				(optional, defaults to all eligible)
 			submit: Whether to submit the salary slips
 
 		Returns:
@@ -174,10 +206,13 @@ class PayslipGenerator:
 		"""
 		if not employees:
 			employees = self.get_eligible_employees()
-			employees = [e.name for e in employees]
 
 		for employee in employees:
-			self.generate_payslip(employee, submit=submit)
+			if isinstance(employee, dict):
+				# Row from get_eligible_employees - reuse its assignment
+				self.generate_payslip(employee.name, submit=submit, preloaded=employee)
+			else:
+				self.generate_payslip(employee, submit=submit)
 
 		return {
 			"created": self.created_slips,
@@ -243,7 +278,9 @@ def delete_my_payslip(name):
 		slip = frappe.get_doc("Salary Slip", name)
 		
 		# Verify ownership
-		employee = frappe.db.get_value("Employee", {"user_id": frappe.session.user}, "name")
+		from arijentek_core.api import get_current_employee
+
+		employee = get_current_employee()
 		if not employee or slip.employee != employee:
 			return {"success": False, "error": "Not authorized to delete this payslip"}
 			
@@ -312,11 +349,13 @@ def get_payslip_details(name):
 	"""
 	slip = frappe.get_doc("Salary Slip", name)
 
-	# Get attendance summary for the period
-	attendance_summary = _get_attendance_summary_for_slip(slip)
-
-	# Get LOP breakdown
-	lop_summary = get_lop_summary(slip.employee, slip.start_date, slip.end_date)
+	# Attendance summary and LOP breakdown for the period from one scan
+	counts = get_attendance_counts(slip.employee, slip.start_date, slip.end_date)
+	attendance_summary = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
+	for row in counts:
+		if row.status in attendance_summary:
+			attendance_summary[row.status] += row.count
+	lop_summary = lop_summary_from_counts(counts)
 
 	# Format earnings and deductions
 	earnings = []
@@ -382,8 +421,8 @@ def _get_month_year(month, year):
 			year = today.year
 
 	# Validation: Cannot generate for current or future months
-	requested_date = getdate(f"{year}-{month:02d}-01")
-	current_month_start = getdate(f"{today.year}-{today.month:02d}-01")
+	requested_date = month_bounds(year, month)[0]
+	current_month_start = month_bounds(today.year, today.month)[0]
 	
 	if requested_date >= current_month_start:
 		frappe.throw(_("Payslips can only be generated for completed previous months."))
@@ -393,33 +432,7 @@ def _get_month_year(month, year):
 
 def _get_pay_period(month, year):
 	"""Get start and end date for a pay period."""
-	start_date = getdate(f"{year}-{month:02d}-01")
-	last_day = calendar.monthrange(year, month)[1]
-	end_date = getdate(f"{year}-{month:02d}-{last_day}")
-	return start_date, end_date
-
-
-def _get_attendance_summary_for_slip(slip):
-	"""Get attendance summary for the salary slip period."""
-	summary = frappe.db.sql(
-		"""
-		SELECT status, COUNT(*) as count
-		FROM `tabAttendance`
-		WHERE employee = %s
-			AND attendance_date BETWEEN %s AND %s
-			AND docstatus = 1
-		GROUP BY status
-		""",
-		(slip.employee, slip.start_date, slip.end_date),
-		as_dict=True,
-	)
-
-	result = {"Present": 0, "Absent": 0, "Half Day": 0, "On Leave": 0}
-	for row in summary:
-		if row.status in result:
-			result[row.status] = row.count
-
-	return result
+	return month_bounds(year, month)
 
 
 @frappe.whitelist()
@@ -436,7 +449,8 @@ def get_employee_payslips(employee, limit=12):
 	"""
 	slips = frappe.db.sql(
 		"""
-		SELECT name, start_date, end_date, gross_pay, net_pay, total_deduction, docstatus
+		SELECT name, start_date, end_date, gross_pay, net_pay, total_deduction, docstatus,
+			MONTHNAME(start_date) as month, YEAR(start_date) as year
 		FROM `tabSalary Slip`
 		WHERE employee = %s
 			AND docstatus != 2
@@ -453,8 +467,8 @@ def get_employee_payslips(employee, limit=12):
 			"name": slip.name,
 			"start_date": str(slip.start_date),
 			"end_date": str(slip.end_date),
-			"month": getdate(slip.start_date).strftime("%B"),
-			"year": getdate(slip.start_date).year,
+			"month": slip.month,
+			"year": slip.year,
 			"gross_pay": flt(slip.gross_pay, 2),
 			"net_pay": flt(slip.net_pay, 2),
 			"total_deduction": flt(slip.total_deduction, 2),
@@ -469,6 +483,9 @@ def download_payslip_pdf(name):
 	"""
 	Generate and download PDF for a salary slip.
 
+	Submitted slips are immutable, so their PDF is cached on disk (keyed by
+	name and modified timestamp) and re-served without re-rendering.
+
 	Args:
 		name: Salary Slip name
 
@@ -484,7 +501,90 @@ def download_payslip_pdf(name):
 	if not employee or (slip.employee != employee and not frappe.has_permission("Salary Slip", "read")):
 		frappe.throw(_("Not authorized to view this payslip"))
 
-	# Generate PDF
+	frappe.local.response.filename = f"Payslip_{slip.start_date}_{slip.employee}.pdf"
+	frappe.local.response.filecontent = get_payslip_pdf(slip)
+	frappe.local.response.type = "pdf"
+
+
+def get_payslip_pdf(slip):
+	"""
+	Return the PDF bytes for a salary slip, using the on-disk cache for submitted slips.
+
+	Args:
+		slip: Salary Slip document
+
+	Returns:
+		PDF content as bytes
+	"""
+	if slip.docstatus != 1:
+		return _render_payslip_pdf(slip)
+
+	path = _get_payslip_pdf_cache_path(slip)
+	if os.path.exists(path):
+		with open(path, "rb") as f:
+			return f.read()
+
+	pdf = _render_payslip_pdf(slip)
+
+	# Write atomically so a concurrent download never reads a partial file
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+	try:
+		with os.fdopen(fd, "wb") as f:
+			f.write(pdf)
+		os.replace(tmp_path, path)
+	except Exception:
+		if os.path.exists(tmp_path):
+			os.remove(tmp_path)
+		raise
+
+	# Drop PDFs of the slip's earlier versions
+	for entry in os.scandir(os.path.dirname(path)):
+		if entry.name.endswith(".pdf") and entry.path != path:
+			try:
+				os.remove(entry.path)
+			except FileNotFoundError:
+				pass
+
+	return pdf
+
+
+def render_payslip_pdf(name):
+	"""Background job: render and cache the PDF of a submitted salary slip."""
+	slip = frappe.get_doc("Salary Slip", name)
+	if slip.docstatus == 1:
+		get_payslip_pdf(slip)
+
+
+def enqueue_payslip_pdf(doc, method=None):
+	"""Hook: pre-render the payslip PDF after a Salary Slip is submitted."""
+	frappe.enqueue(
+		"arijentek_core.payroll.payslip_generator.render_payslip_pdf",
+		queue="short",
+		name=doc.name,
+		enqueue_after_commit=True,
+	)
+
+
+def clear_payslip_pdf_cache(doc, method=None):
+	"""Hook: delete a Salary Slip's cached PDFs when it is cancelled or deleted."""
+	shutil.rmtree(_get_payslip_pdf_cache_dir(doc.name), ignore_errors=True)
+
+
+def _get_payslip_pdf_cache_dir(name):
+	"""Private directory holding a slip's cached PDFs (slip names contain "/")."""
+	key = hashlib.sha256(name.encode()).hexdigest()
+	return frappe.get_site_path("private", "files", "payslips", key)
+
+
+def _get_payslip_pdf_cache_path(slip):
+	"""Private file path of the cached PDF for a slip's current version."""
+	version = hashlib.sha256(str(slip.modified).encode()).hexdigest()
+	return os.path.join(_get_payslip_pdf_cache_dir(slip.name), f"{version}.pdf")
+
+
+def _render_payslip_pdf(slip):
+	"""Render a salary slip with the simplified payslip template."""
 	from frappe.utils.pdf import get_pdf
 	from frappe.utils import formatdate, money_in_words
 
@@ -527,18 +627,11 @@ def download_payslip_pdf(name):
 	
 	# Try-catch specifically for PDF generation to return clearer error
 	try:
-		pdf = get_pdf(html, options=options)
+		return get_pdf(html, options=options)
 	except Exception as e:
 		# Fallback without options if failed
 		frappe.log_error(f"PDF Gen Error: {e}", "Payslip PDF Error")
-		try:
-			pdf = get_pdf(html)
-		except Exception as e2:
-			raise e2
-
-	frappe.local.response.filename = f"Payslip_{slip.start_date}_{slip.employee}.pdf"
-	frappe.local.response.filecontent = pdf
-	frappe.local.response.type = "pdf"
+		return get_pdf(html)
 
 
 @frappe.whitelist()
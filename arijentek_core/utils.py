@@ -1,8 +1,21 @@
+import calendar
+from datetime import date
+from functools import lru_cache
+
 import frappe
 
 PORTAL_PATH = "/employee-portal"
 
 
+# ---------- Date helpers ----------
+
+
+@lru_cache(maxsize=64)
+def month_bounds(year: int, month: int) -> tuple[date, date]:
+	"""First and last day of a month. Pure, so memoised per process."""
+	return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
 # ---------- Hook: get_website_user_home_page ----------
 # Everyone lands on Employee Portal first. System Users can go to desk via "Open Desk" button.
 